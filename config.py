@@ -803,6 +803,15 @@ GRID_CALLBACK_RATIO = 0.005  # 回调比例0.5%触发交易
 # 档位冷却时间(秒)
 GRID_LEVEL_COOLDOWN = 60  # 同一档位60秒内不重复触发
 
+# 远离档位时的行情降频: 未等待回调的会话按距最近档位的回调倍数跳过后续tick
+# 跳过期间仍每个tick检查退出条件, 只跳过追踪器更新与档位穿越检测; 网格重建后重新计算; 0=每个tick都完整检查
+GRID_IDLE_TICK_MAX_SKIP = 0
+
+# 价格追踪器快照: 重启时恢复不超过该时长(秒)的等待回调状态(峰/谷值、穿越档位); 0=不恢复(保守重置)
+# 启用后等待回调状态变化时立即写库, 等待期间按 GRID_TRACKER_PERSIST_INTERVAL 节流写库
+GRID_TRACKER_RESTORE_MAX_AGE = 0
+GRID_TRACKER_PERSIST_INTERVAL = 30  # 秒
+
 # 成功买入后的最短间隔(秒) - 防止级联买入过快
 # 9:25开盘后若价格已低于下轨，连续跌穿多个档位会快速触发多次买入
 # 设为300(5分钟)可避免在极端开盘波动中过快消耗 max_investment
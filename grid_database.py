@@ -16,6 +16,285 @@ from logger import get_logger
 
 logger = get_logger(__name__)
 
+# 基础表DDL(positions/trade_records), 权威Schema见 position_manager.py _create_memory_table
+_BASE_DDL = """
+BEGIN;
+    CREATE TABLE IF NOT EXISTS positions (
+        stock_code TEXT PRIMARY KEY,
+        stock_name TEXT,
+        volume REAL,
+        available REAL,
+        cost_price REAL,
+        base_cost_price REAL,
+        current_price REAL,
+        market_value REAL,
+        profit_ratio REAL,
+        last_update TIMESTAMP,
+        open_date TIMESTAMP,
+        profit_triggered BOOLEAN DEFAULT FALSE,
+        highest_price REAL,
+        stop_loss_price REAL,
+        profit_breakout_triggered BOOLEAN DEFAULT FALSE,
+        breakout_highest_price REAL
+    );
+
+    CREATE TABLE IF NOT EXISTS trade_records (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        stock_code TEXT NOT NULL,
+        trade_type TEXT NOT NULL,
+        price REAL NOT NULL,
+        volume INTEGER NOT NULL,
+        amount REAL NOT NULL,
+        trade_id TEXT,
+        strategy TEXT,
+        trade_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+
+    CREATE INDEX IF NOT EXISTS idx_trade_records_stock
+    ON trade_records(stock_code);
+
+    CREATE INDEX IF NOT EXISTS idx_trade_records_time
+    ON trade_records(trade_time);
+
+    CREATE INDEX IF NOT EXISTS idx_trade_records_identity
+    ON trade_records(trade_id, stock_code, trade_type, trade_time, price, volume, amount);
+COMMIT;
+"""
+
+# 网格交易表DDL, 字段迁移(ALTER TABLE)须在建表之后、建索引之前单独执行
+_GRID_TABLES_DDL = """
+BEGIN;
+    CREATE TABLE IF NOT EXISTS grid_trading_sessions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        stock_code TEXT NOT NULL,
+        status TEXT NOT NULL DEFAULT 'active',
+        enabled INTEGER NOT NULL DEFAULT 1,
+
+        -- 价格配置
+        center_price REAL NOT NULL,
+        current_center_price REAL,
+        price_interval REAL NOT NULL DEFAULT 0.05,
+
+        -- 交易配置
+        position_ratio REAL NOT NULL DEFAULT 0.25,
+        callback_ratio REAL NOT NULL DEFAULT 0.005,
+
+        -- 单次交易份额模式 (amount=固定金额, shares=固定股数)
+        trade_mode TEXT NOT NULL DEFAULT 'amount',
+        fixed_volume INTEGER NOT NULL DEFAULT 0,
+
+        -- 资金配置
+        max_investment REAL NOT NULL,
+        current_investment REAL DEFAULT 0,
+
+        -- 退出配置
+        max_deviation REAL DEFAULT 0.15,
+        target_profit REAL DEFAULT 0.10,
+        stop_loss REAL DEFAULT -0.10,
+
+        -- 统计数据
+        trade_count INTEGER DEFAULT 0,
+        buy_count INTEGER DEFAULT 0,
+        sell_count INTEGER DEFAULT 0,
+        total_buy_amount REAL DEFAULT 0,
+        total_sell_amount REAL DEFAULT 0,
+
+        -- 时间戳
+        start_time TEXT NOT NULL,
+        end_time TEXT NOT NULL,
+        stop_time TEXT,
+        stop_reason TEXT,
+
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+        updated_at TEXT DEFAULT CURRENT_TIMESTAMP,
+
+        -- ⚠️ 新增字段: 风险等级和模板名称
+        risk_level TEXT DEFAULT 'moderate',
+        template_name TEXT
+    );
+
+    CREATE TABLE IF NOT EXISTS grid_trades (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        session_id INTEGER NOT NULL,
+        stock_code TEXT NOT NULL,
+
+        trade_type TEXT NOT NULL,
+        grid_level REAL NOT NULL,
+        trigger_price REAL NOT NULL,
+        volume INTEGER NOT NULL,
+        amount REAL NOT NULL,
+
+        peak_price REAL,
+        valley_price REAL,
+        callback_ratio REAL,
+
+        trade_id TEXT,
+        trade_time TEXT NOT NULL,
+
+        grid_center_before REAL,
+        grid_center_after REAL,
+
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+
+        FOREIGN KEY (session_id) REFERENCES grid_trading_sessions(id) ON DELETE CASCADE
+    );
+
+    CREATE TABLE IF NOT EXISTS grid_orders (
+        order_id TEXT PRIMARY KEY,
+        session_id INTEGER NOT NULL,
+        stock_code TEXT NOT NULL,
+        side TEXT NOT NULL,
+        status TEXT NOT NULL DEFAULT 'submitted',
+        requested_volume INTEGER NOT NULL,
+        expected_price REAL NOT NULL,
+        reserved_price REAL,
+        filled_volume INTEGER DEFAULT 0,
+        filled_amount REAL DEFAULT 0,
+        last_error TEXT,
+        submitted_at TEXT NOT NULL,
+        updated_at TEXT DEFAULT CURRENT_TIMESTAMP,
+        raw_signal TEXT,
+        reorder_after_cancel INTEGER DEFAULT 0,
+        reorder_count INTEGER DEFAULT 0,
+        parent_order_id TEXT,
+        cancel_requested_at TEXT,
+        FOREIGN KEY (session_id) REFERENCES grid_trading_sessions(id) ON DELETE CASCADE
+    );
+
+    CREATE TABLE IF NOT EXISTS grid_lots (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        session_id INTEGER NOT NULL,
+        stock_code TEXT NOT NULL,
+        buy_trade_id TEXT NOT NULL,
+        buy_order_id TEXT,
+        buy_price REAL NOT NULL,
+        original_volume INTEGER NOT NULL,
+        remaining_volume INTEGER NOT NULL,
+        realized_volume INTEGER DEFAULT 0,
+        buy_amount REAL NOT NULL,
+        opened_at TEXT NOT NULL,
+        updated_at TEXT DEFAULT CURRENT_TIMESTAMP,
+        status TEXT NOT NULL DEFAULT 'open',
+        FOREIGN KEY (session_id) REFERENCES grid_trading_sessions(id) ON DELETE CASCADE
+    );
+
+    CREATE TABLE IF NOT EXISTS grid_lot_matches (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        session_id INTEGER NOT NULL,
+        stock_code TEXT NOT NULL,
+        buy_lot_id INTEGER,
+        sell_trade_id TEXT NOT NULL,
+        sell_order_id TEXT,
+        match_type TEXT NOT NULL DEFAULT 'matched',
+        volume INTEGER NOT NULL,
+        buy_price REAL,
+        sell_price REAL NOT NULL,
+        buy_amount REAL DEFAULT 0,
+        sell_amount REAL NOT NULL,
+        realized_pnl REAL DEFAULT 0,
+        matched_at TEXT NOT NULL,
+        FOREIGN KEY (session_id) REFERENCES grid_trading_sessions(id) ON DELETE CASCADE,
+        FOREIGN KEY (buy_lot_id) REFERENCES grid_lots(id) ON DELETE SET NULL
+    );
+
+    CREATE TABLE IF NOT EXISTS grid_config_templates (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        template_name TEXT NOT NULL UNIQUE,
+        price_interval REAL NOT NULL DEFAULT 0.05,
+        position_ratio REAL NOT NULL DEFAULT 0.25,
+        callback_ratio REAL NOT NULL DEFAULT 0.005,
+        max_deviation REAL DEFAULT 0.15,
+        target_profit REAL DEFAULT 0.10,
+        stop_loss REAL DEFAULT -0.10,
+        duration_days INTEGER DEFAULT 7,
+        max_investment_ratio REAL DEFAULT 0.5,
+        description TEXT,
+        is_default BOOLEAN DEFAULT FALSE,
+        usage_count INTEGER DEFAULT 0,
+        last_used_at TEXT,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+        updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+    );
+COMMIT;
+"""
+
+_GRID_INDEXES_DDL = """
+BEGIN;
+    CREATE INDEX IF NOT EXISTS idx_grid_sessions_stock
+    ON grid_trading_sessions(stock_code);
+
+    CREATE INDEX IF NOT EXISTS idx_grid_sessions_status
+    ON grid_trading_sessions(status);
+
+    CREATE INDEX IF NOT EXISTS idx_grid_trades_session
+    ON grid_trades(session_id);
+
+    CREATE INDEX IF NOT EXISTS idx_grid_trades_stock
+    ON grid_trades(stock_code);
+
+    CREATE INDEX IF NOT EXISTS idx_grid_trades_time
+    ON grid_trades(trade_time);
+
+    CREATE INDEX IF NOT EXISTS idx_grid_trades_session_time
+    ON grid_trades(session_id, trade_time);
+
+    CREATE INDEX IF NOT EXISTS idx_grid_orders_session
+    ON grid_orders(session_id);
+
+    CREATE INDEX IF NOT EXISTS idx_grid_orders_status
+    ON grid_orders(status);
+
+    CREATE INDEX IF NOT EXISTS idx_grid_orders_stock
+    ON grid_orders(stock_code);
+
+    CREATE INDEX IF NOT EXISTS idx_grid_lots_session_status
+    ON grid_lots(session_id, status);
+
+    CREATE INDEX IF NOT EXISTS idx_grid_lots_stock
+    ON grid_lots(stock_code);
+
+    CREATE INDEX IF NOT EXISTS idx_grid_lot_matches_session
+    ON grid_lot_matches(session_id);
+
+    CREATE INDEX IF NOT EXISTS idx_grid_lot_matches_sell_trade
+    ON grid_lot_matches(sell_trade_id);
+
+    CREATE INDEX IF NOT EXISTS idx_grid_templates_name
+    ON grid_config_templates(template_name);
+COMMIT;
+"""
+
+# grid_trading_sessions 增量字段迁移: (字段名, 字段定义)
+_GRID_SESSION_MIGRATIONS = [
+    ("risk_level", "TEXT DEFAULT 'moderate'"),
+    ("template_name", "TEXT"),
+    ("enabled", "INTEGER NOT NULL DEFAULT 1"),
+    # True P&L volume tracking fields
+    ("total_buy_volume", "INTEGER DEFAULT 0"),
+    ("total_sell_volume", "INTEGER DEFAULT 0"),
+    # 单次交易份额模式字段 (amount=固定金额, shares=固定股数)
+    ("trade_mode", "TEXT NOT NULL DEFAULT 'amount'"),
+    ("fixed_volume", "INTEGER NOT NULL DEFAULT 0"),
+    # 价格追踪器快照(重启恢复等待回调状态, 见 GRID_TRACKER_RESTORE_MAX_AGE)
+    ("tracker_last_price", "REAL"),
+    ("tracker_peak_price", "REAL"),
+    ("tracker_valley_price", "REAL"),
+    ("tracker_direction", "INTEGER DEFAULT 0"),
+    ("tracker_waiting_callback", "INTEGER DEFAULT 0"),
+    ("tracker_crossed_level", "REAL"),
+    ("tracker_updated_at", "TEXT"),
+]
+
+# grid_orders 增量字段迁移: (字段名, 字段定义)
+_GRID_ORDER_MIGRATIONS = [
+    ("reserved_price", "REAL"),
+    ("reorder_after_cancel", "INTEGER DEFAULT 0"),
+    ("reorder_count", "INTEGER DEFAULT 0"),
+    ("parent_order_id", "TEXT"),
+    ("cancel_requested_at", "TEXT"),
+]
+
 
 class DatabaseManager:
     """数据库管理器"""
@@ -30,6 +309,9 @@ class DatabaseManager:
         self.db_path = db_path or config.DB_PATH
         self.conn = None
         self.lock = threading.RLock()
+        # 账本聚合缓存: session_id -> (批次汇总行, 配对汇总行), 与现价无关。
+        # 行情每tick的退出检测都要汇总账本, 而账本只在成交入账/重建时变化, 两处写入时失效
+        self._ledger_aggregates: Dict[int, tuple] = {}
 
         # 连接数据库
         self._connect()
@@ -50,6 +332,18 @@ class DatabaseManager:
             logger.error(f"数据库连接失败: {str(e)}")
             raise
 
+    def _scalar(self, sql: str, params: tuple = ()):
+        """执行标量查询(COUNT/SUM等), 返回首行首列
+
+        游标单独关闭row_factory, 避免为取单个值构造sqlite3.Row对象。
+        """
+        with self.lock:
+            cursor = self.conn.cursor()
+            cursor.row_factory = None
+            cursor.execute(sql, params)
+            row = cursor.fetchone()
+            return row[0] if row else None
+
     def _init_base_tables(self):
         """初始化基础表(持仓、交易记录)
 
@@ -60,230 +354,36 @@ class DatabaseManager:
         字段定义必须与 position_manager.py 保持一致，任何 Schema 变更须
         同步修改两处。
         """
-        cursor = self.conn.cursor()
-
-        # 创建持仓表（权威定义见 position_manager.py _create_memory_table）
         # available 字段在 SQLite 层不持久化实时值，INSERT 时由 position_manager
         # 统一写 0，由实盘同步覆盖，此处仅保证表结构存在。
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS positions (
-                stock_code TEXT PRIMARY KEY,
-                stock_name TEXT,
-                volume REAL,
-                available REAL,
-                cost_price REAL,
-                base_cost_price REAL,
-                current_price REAL,
-                market_value REAL,
-                profit_ratio REAL,
-                last_update TIMESTAMP,
-                open_date TIMESTAMP,
-                profit_triggered BOOLEAN DEFAULT FALSE,
-                highest_price REAL,
-                stop_loss_price REAL,
-                profit_breakout_triggered BOOLEAN DEFAULT FALSE,
-                breakout_highest_price REAL
-            )
-        """)
-
-        # 创建交易记录表（权威定义见 position_manager.py）
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS trade_records (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                stock_code TEXT NOT NULL,
-                trade_type TEXT NOT NULL,
-                price REAL NOT NULL,
-                volume INTEGER NOT NULL,
-                amount REAL NOT NULL,
-                trade_id TEXT,
-                strategy TEXT,
-                trade_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
+        # executescript 单次提交全部DDL, 避免逐条execute
+        self.conn.executescript(_BASE_DDL)
+        logger.debug("基础表初始化完成")
 
-        cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_trade_records_stock
-            ON trade_records(stock_code)
-        """)
-
-        cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_trade_records_time
-            ON trade_records(trade_time)
-        """)
-
-        cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_trade_records_identity
-            ON trade_records(trade_id, stock_code, trade_type, trade_time, price, volume, amount)
-        """)
-
-        self.conn.commit()
-        logger.debug("基础表初始化完成")
+    def _add_missing_columns(self, cursor, table: str, columns: list):
+        """为已存在的表补充缺失字段, 字段已存在时跳过"""
+        for column_name, column_def in columns:
+            try:
+                cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column_name} {column_def}")
+                logger.info(f"数据库迁移: 添加 {table}.{column_name} 字段")
+            except sqlite3.OperationalError as e:
+                if "duplicate column name" in str(e):
+                    pass  # 字段已存在,跳过
+                else:
+                    raise
 
     def init_grid_tables(self):
         """初始化网格交易表"""
         # 启用外键约束
         self.conn.execute("PRAGMA foreign_keys = ON")
-        cursor = self.conn.cursor()
 
-        # 创建grid_trading_sessions表
-        # 优化: 移除UNIQUE(stock_code, status) ON CONFLICT REPLACE约束
+        # 建表: 优化: grid_trading_sessions 移除UNIQUE(stock_code, status) ON CONFLICT REPLACE约束
         # 改用应用层检查,确保一个股票只有一个active session
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS grid_trading_sessions (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                stock_code TEXT NOT NULL,
-                status TEXT NOT NULL DEFAULT 'active',
-                enabled INTEGER NOT NULL DEFAULT 1,
-
-                -- 价格配置
-                center_price REAL NOT NULL,
-                current_center_price REAL,
-                price_interval REAL NOT NULL DEFAULT 0.05,
-
-                -- 交易配置
-                position_ratio REAL NOT NULL DEFAULT 0.25,
-                callback_ratio REAL NOT NULL DEFAULT 0.005,
-
-                -- 单次交易份额模式 (amount=固定金额, shares=固定股数)
-                trade_mode TEXT NOT NULL DEFAULT 'amount',
-                fixed_volume INTEGER NOT NULL DEFAULT 0,
-
-                -- 资金配置
-                max_investment REAL NOT NULL,
-                current_investment REAL DEFAULT 0,
-
-                -- 退出配置
-                max_deviation REAL DEFAULT 0.15,
-                target_profit REAL DEFAULT 0.10,
-                stop_loss REAL DEFAULT -0.10,
-
-                -- 统计数据
-                trade_count INTEGER DEFAULT 0,
-                buy_count INTEGER DEFAULT 0,
-                sell_count INTEGER DEFAULT 0,
-                total_buy_amount REAL DEFAULT 0,
-                total_sell_amount REAL DEFAULT 0,
-
-                -- 时间戳
-                start_time TEXT NOT NULL,
-                end_time TEXT NOT NULL,
-                stop_time TEXT,
-                stop_reason TEXT,
-
-                created_at TEXT DEFAULT CURRENT_TIMESTAMP,
-                updated_at TEXT DEFAULT CURRENT_TIMESTAMP,
-
-                -- ⚠️ 新增字段: 风险等级和模板名称
-                risk_level TEXT DEFAULT 'moderate',
-                template_name TEXT
-            )
-        """)
+        self.conn.executescript(_GRID_TABLES_DDL)
+        cursor = self.conn.cursor()
 
         # 数据库迁移: 为已存在的表添加新字段
-        try:
-            cursor.execute("ALTER TABLE grid_trading_sessions ADD COLUMN risk_level TEXT DEFAULT 'moderate'")
-            logger.info("数据库迁移: 添加 risk_level 字段")
-        except sqlite3.OperationalError as e:
-            if "duplicate column name" in str(e):
-                pass  # 字段已存在,跳过
-            else:
-                raise
-
-        try:
-            cursor.execute("ALTER TABLE grid_trading_sessions ADD COLUMN template_name TEXT")
-            logger.info("数据库迁移: 添加 template_name 字段")
-        except sqlite3.OperationalError as e:
-            if "duplicate column name" in str(e):
-                pass  # 字段已存在,跳过
-            else:
-                raise
-
-        try:
-            cursor.execute("ALTER TABLE grid_trading_sessions ADD COLUMN enabled INTEGER NOT NULL DEFAULT 1")
-            logger.info("数据库迁移: 添加 enabled 字段")
-        except sqlite3.OperationalError as e:
-            if "duplicate column name" in str(e):
-                pass
-            else:
-                raise
-
-        # True P&L volume tracking fields
-        try:
-            cursor.execute("ALTER TABLE grid_trading_sessions ADD COLUMN total_buy_volume INTEGER DEFAULT 0")
-            logger.info("数据库迁移: 添加 total_buy_volume 字段")
-        except sqlite3.OperationalError as e:
-            if "duplicate column name" in str(e):
-                pass
-            else:
-                raise
-
-        try:
-            cursor.execute("ALTER TABLE grid_trading_sessions ADD COLUMN total_sell_volume INTEGER DEFAULT 0")
-            logger.info("数据库迁移: 添加 total_sell_volume 字段")
-        except sqlite3.OperationalError as e:
-            if "duplicate column name" in str(e):
-                pass
-            else:
-                raise
-
-        # 单次交易份额模式字段 (amount=固定金额, shares=固定股数)
-        try:
-            cursor.execute("ALTER TABLE grid_trading_sessions ADD COLUMN trade_mode TEXT NOT NULL DEFAULT 'amount'")
-            logger.info("数据库迁移: 添加 trade_mode 字段")
-        except sqlite3.OperationalError as e:
-            if "duplicate column name" in str(e):
-                pass
-            else:
-                raise
-
-        try:
-            cursor.execute("ALTER TABLE grid_trading_sessions ADD COLUMN fixed_volume INTEGER NOT NULL DEFAULT 0")
-            logger.info("数据库迁移: 添加 fixed_volume 字段")
-        except sqlite3.OperationalError as e:
-            if "duplicate column name" in str(e):
-                pass
-            else:
-                raise
-
-        cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_grid_sessions_stock
-            ON grid_trading_sessions(stock_code)
-        """)
-
-        cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_grid_sessions_status
-            ON grid_trading_sessions(status)
-        """)
-
-        # 创建grid_trades表
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS grid_trades (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                session_id INTEGER NOT NULL,
-                stock_code TEXT NOT NULL,
-
-                trade_type TEXT NOT NULL,
-                grid_level REAL NOT NULL,
-                trigger_price REAL NOT NULL,
-                volume INTEGER NOT NULL,
-                amount REAL NOT NULL,
-
-                peak_price REAL,
-                valley_price REAL,
-                callback_ratio REAL,
-
-                trade_id TEXT,
-                trade_time TEXT NOT NULL,
-
-                grid_center_before REAL,
-                grid_center_after REAL,
-
-                created_at TEXT DEFAULT CURRENT_TIMESTAMP,
-
-                FOREIGN KEY (session_id) REFERENCES grid_trading_sessions(id) ON DELETE CASCADE
-            )
-        """)
+        self._add_missing_columns(cursor, "grid_trading_sessions", _GRID_SESSION_MIGRATIONS)
 
         # 数据库迁移: 检查grid_trades表结构
         try:
@@ -323,170 +423,10 @@ class DatabaseManager:
                 """)
                 logger.info("grid_trades表重建完成")
 
-        cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_grid_trades_session
-            ON grid_trades(session_id)
-        """)
-
-        cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_grid_trades_stock
-            ON grid_trades(stock_code)
-        """)
-
-        cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_grid_trades_time
-            ON grid_trades(trade_time)
-        """)
-
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS grid_orders (
-                order_id TEXT PRIMARY KEY,
-                session_id INTEGER NOT NULL,
-                stock_code TEXT NOT NULL,
-                side TEXT NOT NULL,
-                status TEXT NOT NULL DEFAULT 'submitted',
-                requested_volume INTEGER NOT NULL,
-                expected_price REAL NOT NULL,
-                reserved_price REAL,
-                filled_volume INTEGER DEFAULT 0,
-                filled_amount REAL DEFAULT 0,
-                last_error TEXT,
-                submitted_at TEXT NOT NULL,
-                updated_at TEXT DEFAULT CURRENT_TIMESTAMP,
-                raw_signal TEXT,
-                reorder_after_cancel INTEGER DEFAULT 0,
-                reorder_count INTEGER DEFAULT 0,
-                parent_order_id TEXT,
-                cancel_requested_at TEXT,
-                FOREIGN KEY (session_id) REFERENCES grid_trading_sessions(id) ON DELETE CASCADE
-            )
-        """)
-
-        cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_grid_orders_session
-            ON grid_orders(session_id)
-        """)
-
-        cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_grid_orders_status
-            ON grid_orders(status)
-        """)
-
-        cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_grid_orders_stock
-            ON grid_orders(stock_code)
-        """)
-
-        try:
-            cursor.execute("ALTER TABLE grid_orders ADD COLUMN reserved_price REAL")
-            logger.info("数据库迁移: 添加 grid_orders.reserved_price 字段")
-        except sqlite3.OperationalError as e:
-            if "duplicate column name" in str(e):
-                pass
-            else:
-                raise
-
-        for column_name, column_def in [
-            ("reorder_after_cancel", "INTEGER DEFAULT 0"),
-            ("reorder_count", "INTEGER DEFAULT 0"),
-            ("parent_order_id", "TEXT"),
-            ("cancel_requested_at", "TEXT"),
-        ]:
-            try:
-                cursor.execute(f"ALTER TABLE grid_orders ADD COLUMN {column_name} {column_def}")
-                logger.info(f"数据库迁移: 添加 grid_orders.{column_name} 字段")
-            except sqlite3.OperationalError as e:
-                if "duplicate column name" in str(e):
-                    pass
-                else:
-                    raise
-
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS grid_lots (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                session_id INTEGER NOT NULL,
-                stock_code TEXT NOT NULL,
-                buy_trade_id TEXT NOT NULL,
-                buy_order_id TEXT,
-                buy_price REAL NOT NULL,
-                original_volume INTEGER NOT NULL,
-                remaining_volume INTEGER NOT NULL,
-                realized_volume INTEGER DEFAULT 0,
-                buy_amount REAL NOT NULL,
-                opened_at TEXT NOT NULL,
-                updated_at TEXT DEFAULT CURRENT_TIMESTAMP,
-                status TEXT NOT NULL DEFAULT 'open',
-                FOREIGN KEY (session_id) REFERENCES grid_trading_sessions(id) ON DELETE CASCADE
-            )
-        """)
-
-        cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_grid_lots_session_status
-            ON grid_lots(session_id, status)
-        """)
-
-        cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_grid_lots_stock
-            ON grid_lots(stock_code)
-        """)
-
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS grid_lot_matches (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                session_id INTEGER NOT NULL,
-                stock_code TEXT NOT NULL,
-                buy_lot_id INTEGER,
-                sell_trade_id TEXT NOT NULL,
-                sell_order_id TEXT,
-                match_type TEXT NOT NULL DEFAULT 'matched',
-                volume INTEGER NOT NULL,
-                buy_price REAL,
-                sell_price REAL NOT NULL,
-                buy_amount REAL DEFAULT 0,
-                sell_amount REAL NOT NULL,
-                realized_pnl REAL DEFAULT 0,
-                matched_at TEXT NOT NULL,
-                FOREIGN KEY (session_id) REFERENCES grid_trading_sessions(id) ON DELETE CASCADE,
-                FOREIGN KEY (buy_lot_id) REFERENCES grid_lots(id) ON DELETE SET NULL
-            )
-        """)
-
-        cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_grid_lot_matches_session
-            ON grid_lot_matches(session_id)
-        """)
-
-        cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_grid_lot_matches_sell_trade
-            ON grid_lot_matches(sell_trade_id)
-        """)
-
-        # 创建grid_config_templates表(网格配置模板)
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS grid_config_templates (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                template_name TEXT NOT NULL UNIQUE,
-                price_interval REAL NOT NULL DEFAULT 0.05,
-                position_ratio REAL NOT NULL DEFAULT 0.25,
-                callback_ratio REAL NOT NULL DEFAULT 0.005,
-                max_deviation REAL DEFAULT 0.15,
-                target_profit REAL DEFAULT 0.10,
-                stop_loss REAL DEFAULT -0.10,
-                duration_days INTEGER DEFAULT 7,
-                max_investment_ratio REAL DEFAULT 0.5,
-                description TEXT,
-                is_default BOOLEAN DEFAULT FALSE,
-                usage_count INTEGER DEFAULT 0,
-                last_used_at TEXT,
-                created_at TEXT DEFAULT CURRENT_TIMESTAMP,
-                updated_at TEXT DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
+        self._add_missing_columns(cursor, "grid_orders", _GRID_ORDER_MIGRATIONS)
 
-        cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_grid_templates_name
-            ON grid_config_templates(template_name)
-        """)
+        # 建索引(须在旧表重建之后)
+        self.conn.executescript(_GRID_INDEXES_DDL)
 
         self.conn.commit()
         logger.info("网格交易表初始化完成")
@@ -608,19 +548,68 @@ class DatabaseManager:
                 self.conn.commit()
             logger.debug(f"[GRID-DB] update_grid_session: 更新完成 session_id={session_id}, affected_rows={cursor.rowcount}")
 
-    def stop_grid_session(self, session_id: int, reason: str):
-        """停止网格会话"""
-        logger.info(f"[GRID-DB] stop_grid_session: session_id={session_id}, reason={reason}")
+    def save_tracker_state(self, session_id: int, state: dict):
+        """保存价格追踪器快照(不改动 updated_at, 不影响会话统计字段)"""
+        logger.debug(f"[GRID-DB] save_tracker_state: session_id={session_id}, state={state}")
 
         with self.lock:
+            should_commit = not self.conn.in_transaction
             cursor = self.conn.cursor()
             cursor.execute("""
+                UPDATE grid_trading_sessions
+                SET tracker_last_price=?, tracker_peak_price=?, tracker_valley_price=?,
+                    tracker_direction=?, tracker_waiting_callback=?, tracker_crossed_level=?,
+                    tracker_updated_at=?
+                WHERE id=? AND status='active'
+            """, (
+                state['last_price'], state['peak_price'], state['valley_price'],
+                state['direction'], 1 if state['waiting_callback'] else 0, state['crossed_level'],
+                datetime.now().isoformat(), session_id
+            ))
+            if should_commit:
+                self.conn.commit()
+
+    def stop_grid_session(self, session_id: int, reason: str, updates: dict = None):
+        """停止网格会话
+
+        参数:
+            updates: 可选, 停止时一并同步的统计字段(与停止状态合并为一条UPDATE, 只提交一次)
+        """
+        logger.info(f"[GRID-DB] stop_grid_session: session_id={session_id}, reason={reason}")
+
+        fields = dict(updates) if updates else {}
+        fields.update(status='stopped', stop_time=datetime.now().isoformat(), stop_reason=reason)
+        self.update_grid_session(session_id, fields)
+
+    def stop_grid_sessions_bulk(self, ids_by_reason: Dict[str, List[int]]) -> int:
+        """批量停止网格会话(单事务)
+
+        参数:
+            ids_by_reason: {停止原因: [session_id, ...]}
+
+        返回:
+            实际更新的行数
+        """
+        params = []
+        stop_time = datetime.now().isoformat()
+        for reason, session_ids in ids_by_reason.items():
+            params.extend(('stopped', stop_time, reason, sid) for sid in session_ids)
+        if not params:
+            return 0
+
+        logger.info(f"[GRID-DB] stop_grid_sessions_bulk: 批量停止 {len(params)} 个会话, "
+                    f"reasons={ {r: len(ids) for r, ids in ids_by_reason.items() if ids} }")
+
+        with self.lock:
+            cursor = self.conn.cursor()
+            cursor.executemany("""
                 UPDATE grid_trading_sessions
                 SET status=?, stop_time=?, stop_reason=?, updated_at=CURRENT_TIMESTAMP
                 WHERE id=?
-            """, ('stopped', datetime.now().isoformat(), reason, session_id))
+            """, params)
             self.conn.commit()
-            logger.debug(f"[GRID-DB] stop_grid_session: 停止完成 session_id={session_id}, affected_rows={cursor.rowcount}")
+            logger.debug(f"[GRID-DB] stop_grid_sessions_bulk: 停止完成 affected_rows={cursor.rowcount}")
+            return cursor.rowcount
 
     def get_all_grid_sessions(self) -> list:
         """获取所有网格会话(包括stopped状态)
@@ -816,14 +805,12 @@ class DatabaseManager:
 
     def get_unmatched_grid_sell_volume(self, session_id: int) -> int:
         """获取尚未被买回动作回补的先卖出数量。"""
-        with self.lock:
-            cursor = self.conn.cursor()
-            cursor.execute("""
-                SELECT COALESCE(SUM(volume), 0)
-                FROM grid_lot_matches
-                WHERE session_id=? AND match_type='unmatched'
-            """, (session_id,))
-            return int(cursor.fetchone()[0] or 0)
+        volume = self._scalar("""
+            SELECT COALESCE(SUM(volume), 0)
+            FROM grid_lot_matches
+            WHERE session_id=? AND match_type='unmatched'
+        """, (session_id,))
+        return int(volume or 0)
 
     def _insert_grid_buy_lot(self, cursor, trade_data: dict, volume: int,
                              remaining_volume: int, realized_volume: int,
@@ -1009,6 +996,7 @@ class DatabaseManager:
 
     def _apply_grid_ledger(self, cursor, trade_data: dict):
         """根据成交方向更新真实网格账本。"""
+        self._ledger_aggregates.pop(trade_data.get('session_id'), None)
         trade_type = str(trade_data.get('trade_type') or '').upper()
         if trade_type == 'BUY':
             self._record_grid_buy_lot(cursor, trade_data)
@@ -1070,27 +1058,34 @@ class DatabaseManager:
 
     def _get_grid_ledger_summary_unlocked(self, cursor, session_id: int,
                                           current_price: float = None) -> dict:
-        cursor.execute("""
-            SELECT
-                COUNT(*) AS lot_count,
-                COALESCE(SUM(original_volume), 0) AS bought_volume,
-                COALESCE(SUM(remaining_volume), 0) AS open_volume,
-                COALESCE(SUM(remaining_volume * buy_price), 0) AS open_cost
-            FROM grid_lots
-            WHERE session_id=?
-        """, (session_id,))
-        lot_row = dict(cursor.fetchone())
+        cached = self._ledger_aggregates.get(session_id)
+        if cached is not None:
+            lot_row, match_row = cached
+        else:
+            cursor.execute("""
+                SELECT
+                    COUNT(*) AS lot_count,
+                    COALESCE(SUM(original_volume), 0) AS bought_volume,
+                    COALESCE(SUM(remaining_volume), 0) AS open_volume,
+                    COALESCE(SUM(remaining_volume * buy_price), 0) AS open_cost
+                FROM grid_lots
+                WHERE session_id=?
+            """, (session_id,))
+            lot_row = dict(cursor.fetchone())
 
-        cursor.execute("""
-            SELECT
-                COUNT(*) AS match_count,
-                COALESCE(SUM(CASE WHEN match_type='matched' THEN volume ELSE 0 END), 0) AS matched_volume,
-                COALESCE(SUM(CASE WHEN match_type='unmatched' THEN volume ELSE 0 END), 0) AS unmatched_volume,
-                COALESCE(SUM(CASE WHEN match_type='matched' THEN realized_pnl ELSE 0 END), 0) AS realized_pnl
-            FROM grid_lot_matches
-            WHERE session_id=?
-        """, (session_id,))
-        match_row = dict(cursor.fetchone())
+            cursor.execute("""
+                SELECT
+                    COUNT(*) AS match_count,
+                    COALESCE(SUM(CASE WHEN match_type='matched' THEN volume ELSE 0 END), 0) AS matched_volume,
+                    COALESCE(SUM(CASE WHEN match_type='unmatched' THEN volume ELSE 0 END), 0) AS unmatched_volume,
+                    COALESCE(SUM(CASE WHEN match_type='matched' THEN realized_pnl ELSE 0 END), 0) AS realized_pnl
+                FROM grid_lot_matches
+                WHERE session_id=?
+            """, (session_id,))
+            match_row = dict(cursor.fetchone())
+            # 事务内读到的是未提交数据, 可能随回滚作废, 只缓存已提交状态
+            if not self.conn.in_transaction:
+                self._ledger_aggregates[session_id] = (lot_row, match_row)
 
         current_price = float(current_price) if current_price is not None else None
         open_market_value = (
@@ -1125,6 +1120,7 @@ class DatabaseManager:
     def rebuild_grid_ledger_for_session(self, session_id: int) -> dict:
         """按成交明细重建单个会话账本，用于修复历史先卖后买未配对数据。"""
         with self.lock:
+            self._ledger_aggregates.pop(session_id, None)
             cursor = self.conn.cursor()
             try:
                 cursor.execute("BEGIN")
@@ -1181,8 +1177,10 @@ class DatabaseManager:
         return [self.rebuild_grid_ledger_for_session(session_id) for session_id in session_ids]
 
     def get_grid_trades(self, session_id: int, limit=50, offset=0) -> list:
-        """获取网格交易历史"""
+        """获取网格交易历史(OFFSET分页, 深翻页请使用get_grid_trades_after)"""
         logger.debug(f"[GRID-DB] get_grid_trades: session_id={session_id}, limit={limit}, offset={offset}")
+        if offset:
+            logger.debug("[GRID-DB] get_grid_trades: OFFSET分页已不推荐, 请改用get_grid_trades_after游标分页")
 
         with self.lock:
             cursor = self.conn.cursor()
@@ -1196,6 +1194,52 @@ class DatabaseManager:
             logger.debug(f"[GRID-DB] get_grid_trades: session_id={session_id}, 查询到 {len(results)} 条记录")
             return results
 
+    def get_grid_trades_after(self, session_id: int, before_time: Optional[str] = None,
+                              before_id: Optional[int] = None, limit=50) -> list:
+        """
+        游标分页获取网格交易历史
+
+        游标为 (trade_time, id) 复合键: 分批成交可能共用同一个券商成交时间,
+        仅按 trade_time 翻页会丢掉与上一页末条同时间的记录。
+
+        Args:
+            session_id: 会话ID
+            before_time: 游标, 传入上一页最后一条记录的trade_time; None表示第一页
+            before_id: 游标, 传入上一页最后一条记录的id; None时仅按trade_time翻页(兼容旧调用)
+            limit: 每页条数
+        """
+        logger.debug(f"[GRID-DB] get_grid_trades_after: session_id={session_id}, before_time={before_time}, "
+                     f"before_id={before_id}, limit={limit}")
+
+        with self.lock:
+            cursor = self.conn.cursor()
+            if before_time is None:
+                cursor.execute("""
+                    SELECT * FROM grid_trades
+                    WHERE session_id=?
+                    ORDER BY trade_time DESC, id DESC
+                    LIMIT ?
+                """, (session_id, limit))
+            elif before_id is None:
+                cursor.execute("""
+                    SELECT * FROM grid_trades
+                    WHERE session_id=? AND trade_time < ?
+                    ORDER BY trade_time DESC, id DESC
+                    LIMIT ?
+                """, (session_id, before_time, limit))
+            else:
+                # trade_time <= ? 单独作为索引范围条件, 从游标位置开始扫描而非从最新一条往下扫
+                cursor.execute("""
+                    SELECT * FROM grid_trades
+                    WHERE session_id=? AND trade_time <= ?
+                      AND (trade_time < ? OR id < ?)
+                    ORDER BY trade_time DESC, id DESC
+                    LIMIT ?
+                """, (session_id, before_time, before_time, before_id, limit))
+            results = [dict(row) for row in cursor.fetchall()]
+            logger.debug(f"[GRID-DB] get_grid_trades_after: session_id={session_id}, 查询到 {len(results)} 条记录")
+            return results
+
     def get_grid_session(self, session_id: int):
         """获取指定网格会话"""
         logger.debug(f"[GRID-DB] get_grid_session: session_id={session_id}")
@@ -1215,14 +1259,11 @@ class DatabaseManager:
         """获取网格交易总数"""
         logger.debug(f"[GRID-DB] get_grid_trade_count: session_id={session_id}")
 
-        with self.lock:
-            cursor = self.conn.cursor()
-            cursor.execute("""
-                SELECT COUNT(*) FROM grid_trades WHERE session_id=?
-            """, (session_id,))
-            count = cursor.fetchone()[0]
-            logger.debug(f"[GRID-DB] get_grid_trade_count: session_id={session_id}, count={count}")
-            return count
+        count = self._scalar("""
+            SELECT COUNT(*) FROM grid_trades WHERE session_id=?
+        """, (session_id,))
+        logger.debug(f"[GRID-DB] get_grid_trade_count: session_id={session_id}, count={count}")
+        return count
 
     # ======================= 网格配置模板管理 =======================
 
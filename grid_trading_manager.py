@@ -7,9 +7,12 @@
 - GridTradingManager: 网格交易管理器
 """
 
-from dataclasses import dataclass
+from collections.abc import MutableMapping
+from dataclasses import MISSING, dataclass, field, fields, replace
 from datetime import datetime, timedelta
-from typing import Optional, Dict, List
+import heapq
+import logging
+from typing import Optional, Dict, List, NamedTuple
 import threading
 import time
 import json
@@ -20,7 +23,61 @@ from logger import get_logger
 
 logger = get_logger(__name__)
 
-
+# PriceTracker.direction 取值: 以符号表示方向, 回调比例可统一按 direction*(基准价-现价)/基准价 计算
+DIR_NONE = 0
+DIR_RISING = 1
+DIR_FALLING = -1
+DIRECTION_NAMES = {DIR_NONE: None, DIR_RISING: 'rising', DIR_FALLING: 'falling'}
+
+
+def _with_slots(cls):
+    """为dataclass生成带__slots__的版本(等价于Python 3.10+的dataclass(slots=True), 兼容3.8/3.9)
+
+    实例不再携带__dict__, 降低每个会话/追踪器的内存占用并加快属性访问。
+    """
+    field_names = tuple(f.name for f in fields(cls))
+    cls_dict = dict(cls.__dict__)
+    cls_dict['__slots__'] = field_names
+    for name in field_names:
+        # 默认值已固化在生成的__init__中, 类属性会与同名slot冲突
+        cls_dict.pop(name, None)
+    cls_dict.pop('__dict__', None)
+    cls_dict.pop('__weakref__', None)
+    slotted = type(cls)(cls.__name__, cls.__bases__, cls_dict)
+
+    # init=False 且带默认值的字段, 3.8/3.9 生成的__init__依赖类属性提供默认值, 需在此补上赋值
+    runtime_defaults = tuple((f.name, f.default) for f in fields(cls)
+                             if not f.init and f.default is not MISSING)
+    if runtime_defaults:
+        dataclass_init = slotted.__init__
+
+        def __init__(self, *args, **kwargs):
+            for name, value in runtime_defaults:
+                object.__setattr__(self, name, value)
+            dataclass_init(self, *args, **kwargs)
+
+        __init__.__qualname__ = dataclass_init.__qualname__
+        __init__.__doc__ = dataclass_init.__doc__
+        slotted.__init__ = __init__
+    return slotted
+
+
+class GridLevels(NamedTuple):
+    """网格档位(不可变, 可在会话上缓存复用)
+
+    兼容旧的字典式访问: levels['lower'] 与 levels.lower / levels[0] 等价。
+    """
+    lower: float
+    center: float
+    upper: float
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            return getattr(self, key)
+        return tuple.__getitem__(self, key)
+
+
+@_with_slots
 @dataclass
 class GridSession:
     """网格交易会话"""
@@ -66,6 +123,24 @@ class GridSession:
     stop_time: Optional[datetime] = None
     stop_reason: Optional[str] = None
 
+    # 运行时状态(不持久化): 绑定的价格追踪器, 行情检查时免去 trackers 字典查找
+    tracker: Optional['PriceTracker'] = field(default=None, repr=False, compare=False)
+
+    # 运行时缓存(不持久化): 网格档位及其计算依据, 中心价或间隔变化后自动重算
+    _levels_key: Optional[tuple] = field(default=None, init=False, repr=False, compare=False)
+    _levels: Optional[GridLevels] = field(default=None, init=False, repr=False, compare=False)
+
+    # 运行时缓存(不持久化): end_time 对应的 epoch 秒, end_time 被重新赋值后自动重算
+    _end_time_key: Optional[datetime] = field(default=None, init=False, repr=False, compare=False)
+    _end_time_epoch: Optional[float] = field(default=None, init=False, repr=False, compare=False)
+
+    # 运行时状态(不持久化): 远离档位时剩余可跳过的行情tick数(见 GRID_IDLE_TICK_MAX_SKIP)
+    _idle_ticks: int = field(default=0, init=False, repr=False, compare=False)
+
+    # 运行时状态(不持久化): 最近一次写库的追踪器快照及其 monotonic 时间(见 GRID_TRACKER_RESTORE_MAX_AGE)
+    _tracker_saved: Optional[tuple] = field(default=None, init=False, repr=False, compare=False)
+    _tracker_saved_at: float = field(default=0.0, init=False, repr=False, compare=False)
+
     def get_profit_ratio(self) -> float:
         """
         计算网格盈亏率（基于max_investment）
@@ -79,14 +154,14 @@ class GridSession:
         """
         # max_investment为0说明配置异常，返回0.0
         if self.max_investment <= 0:
-            logger.debug(f"[GRID] get_profit_ratio: stock_code={self.stock_code}, "
-                        f"session_id={self.id}, max_investment={self.max_investment}, 返回0.0")
+            logger.debug("[GRID] get_profit_ratio: stock_code=%s, session_id=%s, max_investment=%s, 返回0.0",
+                         self.stock_code, self.id, self.max_investment)
             return 0.0
 
         # 无任何交易时返回0.0（中性状态）
         if self.total_buy_amount == 0 and self.total_sell_amount == 0:
-            logger.debug(f"[GRID] get_profit_ratio: stock_code={self.stock_code}, "
-                        f"session_id={self.id}, 无交易记录, 返回0.0")
+            logger.debug("[GRID] get_profit_ratio: stock_code=%s, session_id=%s, 无交易记录, 返回0.0",
+                         self.stock_code, self.id)
             return 0.0
 
         # 网格累计利润 = 卖出总额 - 买入总额
@@ -95,10 +170,10 @@ class GridSession:
         # 盈亏率 = 网格累计利润 / 最大投入额度
         ratio = grid_profit / self.max_investment
 
-        logger.debug(f"[GRID] get_profit_ratio: stock_code={self.stock_code}, "
-                    f"session_id={self.id}, sell={self.total_sell_amount:.2f}, "
-                    f"buy={self.total_buy_amount:.2f}, grid_profit={grid_profit:.2f}, "
-                    f"max_investment={self.max_investment:.2f}, ratio={ratio*100:.2f}%")
+        logger.debug("[GRID] get_profit_ratio: stock_code=%s, session_id=%s, sell=%.2f, buy=%.2f, "
+                     "grid_profit=%.2f, max_investment=%.2f, ratio=%.2f%%",
+                     self.stock_code, self.id, self.total_sell_amount, self.total_buy_amount,
+                     grid_profit, self.max_investment, ratio * 100)
         return ratio
 
     def get_profit_ratio_by_market_value(self, position_volume: float, current_price: float) -> float:
@@ -124,16 +199,16 @@ class GridSession:
             grid_profit = self.total_sell_amount - self.total_buy_amount
             ratio = grid_profit / position_market_value
             logger.debug(
-                f"[GRID] get_profit_ratio_by_market_value: stock_code={self.stock_code}, "
-                f"grid_profit={grid_profit:.2f}, volume={position_volume:.0f}, "
-                f"price={current_price:.2f}, market_value={position_market_value:.2f}, "
-                f"ratio={ratio*100:.2f}%"
+                "[GRID] get_profit_ratio_by_market_value: stock_code=%s, grid_profit=%.2f, volume=%.0f, "
+                "price=%.2f, market_value=%.2f, ratio=%.2f%%",
+                self.stock_code, grid_profit, position_volume,
+                current_price, position_market_value, ratio * 100
             )
             return ratio
         # 降级：无有效持仓数据，回退到 max_investment 分母
         logger.debug(
-            f"[GRID] get_profit_ratio_by_market_value: 无有效持仓(volume={position_volume}, "
-            f"price={current_price:.2f}), 降级为get_profit_ratio()"
+            "[GRID] get_profit_ratio_by_market_value: 无有效持仓(volume=%s, price=%.2f), 降级为get_profit_ratio()",
+            position_volume, current_price
         )
         return self.get_profit_ratio()
 
@@ -160,23 +235,18 @@ class GridSession:
             unrealized = open_volume * current_price
             true_pnl = realized + unrealized
             if self.max_investment <= 0:
-                logger.debug(
-                    f"[GRID] get_true_pnl_ratio: max_investment=0, return 0.0"
-                )
+                logger.debug("[GRID] get_true_pnl_ratio: max_investment=0, return 0.0")
                 return 0.0
             ratio = true_pnl / self.max_investment
             logger.debug(
-                f"[GRID] get_true_pnl_ratio: stock_code={self.stock_code}, "
-                f"realized={realized:.2f}, unrealized={unrealized:.2f}, "
-                f"true_pnl={true_pnl:.2f}, open_vol={open_volume}, "
-                f"price={current_price:.2f}, ratio={ratio*100:.2f}%"
+                "[GRID] get_true_pnl_ratio: stock_code=%s, realized=%.2f, unrealized=%.2f, "
+                "true_pnl=%.2f, open_vol=%s, price=%.2f, ratio=%.2f%%",
+                self.stock_code, realized, unrealized,
+                true_pnl, open_volume, current_price, ratio * 100
             )
             return ratio
         # Fallback: old session without volume tracking
-        logger.debug(
-            f"[GRID] get_true_pnl_ratio: no volume data, "
-            f"fallback to get_profit_ratio_by_market_value"
-        )
+        logger.debug("[GRID] get_true_pnl_ratio: no volume data, fallback to get_profit_ratio_by_market_value")
         return self.get_profit_ratio_by_market_value(position_volume, current_price)
 
     def get_grid_profit(self) -> float:
@@ -191,28 +261,52 @@ class GridSession:
     def get_deviation_ratio(self) -> float:
         """计算当前偏离度"""
         if self.center_price == 0 or self.current_center_price == 0:
-            logger.debug(f"[GRID] get_deviation_ratio: stock_code={self.stock_code}, session_id={self.id}, "
-                        f"center_price={self.center_price}, current_center={self.current_center_price}, 返回0.0")
+            logger.debug("[GRID] get_deviation_ratio: stock_code=%s, session_id=%s, center_price=%s, current_center=%s, 返回0.0",
+                         self.stock_code, self.id, self.center_price, self.current_center_price)
             return 0.0
         deviation = abs(self.current_center_price - self.center_price) / self.center_price
-        logger.debug(f"[GRID] get_deviation_ratio: stock_code={self.stock_code}, session_id={self.id}, "
-                    f"center={self.center_price:.2f}, current={self.current_center_price:.2f}, deviation={deviation*100:.2f}%")
+        logger.debug("[GRID] get_deviation_ratio: stock_code=%s, session_id=%s, center=%.2f, current=%.2f, deviation=%.2f%%",
+                     self.stock_code, self.id, self.center_price, self.current_center_price, deviation * 100)
         return deviation
 
-    def get_grid_levels(self) -> dict:
-        """生成当前网格档位"""
+    def get_grid_levels(self) -> GridLevels:
+        """生成当前网格档位(中心价与间隔未变时复用缓存)"""
+        key = (self.current_center_price, self.center_price, self.price_interval)
+        if self._levels_key == key:
+            return self._levels
+
         center = self.current_center_price or self.center_price
-        levels = {
-            'lower': center * (1 - self.price_interval),
-            'center': center,
-            'upper': center * (1 + self.price_interval)
-        }
-        logger.debug(f"[GRID] get_grid_levels: stock_code={self.stock_code}, session_id={self.id}, "
-                    f"center={center:.2f}, interval={self.price_interval*100:.1f}%, "
-                    f"lower={levels['lower']:.2f}, upper={levels['upper']:.2f}")
+        levels = GridLevels(
+            lower=center * (1 - self.price_interval),
+            center=center,
+            upper=center * (1 + self.price_interval)
+        )
+        self._levels_key = key
+        self._levels = levels
+        logger.debug("[GRID] get_grid_levels: stock_code=%s, session_id=%s, center=%.2f, interval=%.1f%%, "
+                     "lower=%.2f, upper=%.2f",
+                     self.stock_code, self.id, center, self.price_interval * 100, levels.lower, levels.upper)
         return levels
 
+    def get_end_time_epoch(self) -> Optional[float]:
+        """返回 end_time 的 epoch 秒(未设置时为None), 供行情热路径与 time.time() 直接比较"""
+        end_time = self.end_time
+        if end_time is None:
+            return None
+        if self._end_time_key is not end_time:
+            self._end_time_key = end_time
+            self._end_time_epoch = end_time.timestamp()
+        return self._end_time_epoch
+
 
+# 重启恢复时直接从数据库行拷贝的字段(时间字段需解析, 停止信息与运行时追踪器不恢复)
+_SESSION_ROW_FIELDS = tuple(
+    f.name for f in fields(GridSession)
+    if f.init and f.name not in ('start_time', 'end_time', 'stop_time', 'stop_reason', 'tracker')
+)
+
+
+@_with_slots
 @dataclass
 class PriceTracker:
     """价格追踪器,用于检测回调"""
@@ -220,30 +314,41 @@ class PriceTracker:
     last_price: float = 0.0
     peak_price: float = 0.0
     valley_price: float = 0.0
-    direction: Optional[str] = None
+    direction: int = DIR_NONE
     crossed_level: Optional[float] = None
     waiting_callback: bool = False
 
+    @property
+    def direction_name(self) -> Optional[str]:
+        """方向名称('rising'/'falling'/None), 用于日志和API展示"""
+        return DIRECTION_NAMES.get(self.direction)
+
     def update_price(self, new_price: float):
         """更新价格并追踪峰谷值"""
         self.last_price = new_price
-        logger.debug(f"[GRID] PriceTracker.update_price: session_id={self.session_id}, new_price={new_price:.2f}, "
-                    f"waiting_callback={self.waiting_callback}, direction={self.direction}")
+        # 每个tick都会执行: DEBUG未开启时跳过f-string格式化
+        debug_enabled = logger.isEnabledFor(logging.DEBUG)
+        if debug_enabled:
+            logger.debug("[GRID] PriceTracker.update_price: session_id=%s, new_price=%.2f, waiting_callback=%s, direction=%s",
+                         self.session_id, new_price, self.waiting_callback, self.direction_name)
 
         if self.waiting_callback:
-            old_peak = self.peak_price
-            old_valley = self.valley_price
-            if self.direction == 'rising' and new_price > self.peak_price:
+            if self.direction == DIR_RISING and new_price > self.peak_price:
+                if debug_enabled:
+                    logger.debug("[GRID] PriceTracker: 更新峰值 %.2f -> %.2f", self.peak_price, new_price)
                 self.peak_price = new_price
-                logger.debug(f"[GRID] PriceTracker: 更新峰值 {old_peak:.2f} -> {new_price:.2f}")
-            elif self.direction == 'falling' and new_price < self.valley_price:
+            elif self.direction == DIR_FALLING and new_price < self.valley_price:
+                if debug_enabled:
+                    logger.debug("[GRID] PriceTracker: 更新谷值 %.2f -> %.2f", self.valley_price, new_price)
                 self.valley_price = new_price
-                logger.debug(f"[GRID] PriceTracker: 更新谷值 {old_valley:.2f} -> {new_price:.2f}")
 
     def check_callback(self, callback_ratio: float) -> Optional[str]:
         """检查是否触发回调,返回信号类型"""
-        if not self.waiting_callback:
-            logger.debug(f"[GRID] PriceTracker.check_callback: session_id={self.session_id}, 未等待回调, 返回None")
+        direction = self.direction
+        debug_enabled = logger.isEnabledFor(logging.DEBUG)
+        if not self.waiting_callback or direction == DIR_NONE:
+            if debug_enabled:
+                logger.debug("[GRID] PriceTracker.check_callback: session_id=%s, 未等待回调, 返回None", self.session_id)
             return None
 
         # 浮点数容差:仅用于补偿浮点计算误差
@@ -252,47 +357,146 @@ class PriceTracker:
         # 2. 0.01%容差足以处理浮点运算误差,避免过度宽松
         FLOAT_TOLERANCE = 0.0001
 
-        if self.direction == 'rising':
-            if self.peak_price == 0:
-                logger.warning(f"[GRID] PriceTracker.check_callback: session_id={self.session_id}, peak_price=0, 返回None")
-                return None
-            ratio = (self.peak_price - self.last_price) / self.peak_price
-            logger.debug(f"[GRID] PriceTracker.check_callback: session_id={self.session_id}, direction=rising, "
-                        f"peak={self.peak_price:.2f}, last={self.last_price:.2f}, ratio={ratio*100:.4f}%, "
-                        f"threshold={callback_ratio*100:.2f}%")
-            # 使用容差比较：ratio >= callback_ratio - FLOAT_TOLERANCE
-            if ratio >= (callback_ratio - FLOAT_TOLERANCE):
-                logger.debug(f"[GRID] PriceTracker.check_callback: 触发SELL信号 (ratio={ratio:.6f}, threshold-tolerance={callback_ratio - FLOAT_TOLERANCE:.6f})")
-                return 'SELL'
-
-        elif self.direction == 'falling':
-            if self.valley_price == 0:
-                logger.warning(f"[GRID] PriceTracker.check_callback: session_id={self.session_id}, valley_price=0, 返回None")
-                return None
-            ratio = (self.last_price - self.valley_price) / self.valley_price
-            logger.debug(f"[GRID] PriceTracker.check_callback: session_id={self.session_id}, direction=falling, "
-                        f"valley={self.valley_price:.2f}, last={self.last_price:.2f}, ratio={ratio*100:.4f}%, "
-                        f"threshold={callback_ratio*100:.2f}%")
-            # 使用容差比较：ratio >= callback_ratio - FLOAT_TOLERANCE
-            if ratio >= (callback_ratio - FLOAT_TOLERANCE):
-                logger.debug(f"[GRID] PriceTracker.check_callback: 触发BUY信号 (ratio={ratio:.6f}, threshold-tolerance={callback_ratio - FLOAT_TOLERANCE:.6f})")
-                return 'BUY'
-
-        logger.debug(f"[GRID] PriceTracker.check_callback: session_id={self.session_id}, 未触发信号")
+        # 上涨等待回落看峰值, 下跌等待反弹看谷值; 方向符号统一两种回调比例的计算
+        rising = direction == DIR_RISING
+        pivot = self.peak_price if rising else self.valley_price
+        if pivot == 0:
+            logger.warning(f"[GRID] PriceTracker.check_callback: session_id={self.session_id}, "
+                           f"{'peak_price' if rising else 'valley_price'}=0, 返回None")
+            return None
+
+        # 以乘法比较代替除法: direction*(pivot-last)/pivot >= 阈值  <=>  direction*(pivot-last) >= 阈值*pivot (pivot>0)
+        threshold = callback_ratio - FLOAT_TOLERANCE
+        move = direction * (pivot - self.last_price)
+        required = threshold * pivot
+        if debug_enabled:
+            logger.debug("[GRID] PriceTracker.check_callback: session_id=%s, direction=%s, pivot=%.2f, last=%.2f, "
+                         "move=%.4f, required=%.4f, threshold=%.2f%%",
+                         self.session_id, self.direction_name, pivot, self.last_price,
+                         move, required, callback_ratio * 100)
+        # 使用容差比较：回调幅度 >= callback_ratio - FLOAT_TOLERANCE
+        if move >= required:
+            signal_type = 'SELL' if rising else 'BUY'
+            logger.debug("[GRID] PriceTracker.check_callback: 触发%s信号 (move=%.6f, required=%.6f)",
+                         signal_type, move, required)
+            return signal_type
+
+        if debug_enabled:
+            logger.debug("[GRID] PriceTracker.check_callback: session_id=%s, 未触发信号", self.session_id)
         return None
 
     def reset(self, price: float):
         """重置追踪器"""
-        logger.debug(f"[GRID] PriceTracker.reset: session_id={self.session_id}, price={price:.2f}, "
-                    f"重置前: direction={self.direction}, crossed_level={self.crossed_level}, waiting_callback={self.waiting_callback}")
+        logger.debug("[GRID] PriceTracker.reset: session_id=%s, price=%.2f, 重置前: direction=%s, crossed_level=%s, waiting_callback=%s",
+                     self.session_id, price, self.direction_name, self.crossed_level, self.waiting_callback)
         self.last_price = price
         self.peak_price = price
         self.valley_price = price
-        self.direction = None
+        self.direction = DIR_NONE
         self.crossed_level = None
         self.waiting_callback = False
 
 
+_EMPTY_LEVELS: Dict[int, float] = {}
+
+# 档位价格取整精度: 按万分之一元折算为整数刻度作冷却键
+_LEVEL_TICK_SCALE = 10000
+
+
+def _level_tick(level_price: float) -> int:
+    """档位价格折算为整数刻度, 同一档位经不同计算路径得到的末位误差不影响冷却匹配"""
+    return round(level_price * _LEVEL_TICK_SCALE)
+
+
+# 股数取整容差: 乘除得到的股数恰为整手时, 浮点误差可能使其略小于整数(如 4803/16.01)
+_LOT_FLOOR_EPSILON = 1e-6
+
+
+def _floor_to_lot(shares: float) -> int:
+    """股数向下取整到100股整数倍, 先加微小容差, 避免恰为整手时因浮点误差少算一手"""
+    return int(shares + _LOT_FLOOR_EPSILON) // 100 * 100
+
+
+class LevelCooldowns(MutableMapping):
+    """
+    档位冷却记录
+
+    对外仍按 (session_id, level_price) -> 时间戳 的字典方式访问,
+    内部按会话分组存储, 停止/恢复会话时可整体移除而无需扫描全部键。
+    档位价格按 _level_tick 折算为整数刻度存储, 迭代时还原为价格。
+    时间戳取自 time.monotonic(), 不受系统时钟调整影响。
+
+    另维护按开始时间排序的最小堆, 过期清理只弹出到期记录; 字典为准,
+    堆中已被删除或覆盖的条目在弹出时惰性丢弃。
+    """
+
+    def __init__(self):
+        self._by_session: Dict[int, Dict[int, float]] = {}
+        self._heap: List[tuple] = []  # [(开始时间, session_id, 档位刻度)]
+
+    def __getitem__(self, key):
+        session_id, level_price = key
+        return self._by_session[session_id][_level_tick(level_price)]
+
+    def __setitem__(self, key, value):
+        session_id, level_price = key
+        tick = _level_tick(level_price)
+        levels = self._by_session.get(session_id)
+        if levels is None:
+            levels = self._by_session[session_id] = {}
+        levels[tick] = value
+        heapq.heappush(self._heap, (value, session_id, tick))
+
+    def __delitem__(self, key):
+        session_id, level_price = key
+        levels = self._by_session[session_id]
+        del levels[_level_tick(level_price)]
+        if not levels:
+            del self._by_session[session_id]
+
+    def __iter__(self):
+        for session_id, levels in list(self._by_session.items()):
+            for tick in list(levels):
+                yield (session_id, tick / _LEVEL_TICK_SCALE)
+
+    def __len__(self):
+        return sum(len(levels) for levels in self._by_session.values())
+
+    def __repr__(self):
+        return f"LevelCooldowns({dict(self.items())!r})"
+
+    def started_at(self, session_id: int, level_price: float) -> Optional[float]:
+        """返回档位冷却开始时间, 无记录时返回None(免去元组键构造)"""
+        return self._by_session.get(session_id, _EMPTY_LEVELS).get(_level_tick(level_price))
+
+    def drop_session(self, session_id: int) -> int:
+        """移除会话的全部冷却记录, 返回移除条数"""
+        levels = self._by_session.pop(session_id, None)
+        return len(levels) if levels else 0
+
+    def expire_due(self, now: float, cooldown: float) -> int:
+        """移除已超过冷却时长的记录, 返回移除条数(无到期记录时为O(1))"""
+        heap = self._heap
+        deadline = now - cooldown
+        removed = 0
+        while heap and heap[0][0] <= deadline:
+            started, session_id, tick = heapq.heappop(heap)
+            levels = self._by_session.get(session_id)
+            # 仅当字典中仍是同一条记录时才删除(已删除/已刷新的为过期堆条目)
+            if levels is None or levels.get(tick) != started:
+                continue
+            del levels[tick]
+            removed += 1
+            if not levels:
+                del self._by_session[session_id]
+        return removed
+
+
+# 启动会话时查询持仓的工作线程上限: 超时返回后仍卡住的查询会一直占用线程直到返回,
+# 全部被占用时后续启动请求只能排队并超时, 见 start_grid_session 的告警日志
+_POSITION_QUERY_WORKERS = 2
+
+
 class GridTradingManager:
     """网格交易管理器"""
 
@@ -326,11 +530,36 @@ class GridTradingManager:
         except (TypeError, ValueError):
             return default
 
+    @staticmethod
+    def _as_datetime(value) -> datetime:
+        """数据库时间字段转datetime(驱动已返回datetime时直接复用,避免重复解析)"""
+        if isinstance(value, datetime):
+            return value
+        return datetime.fromisoformat(value)
+
     def _clear_position_cleared_confirmation(self, session: GridSession) -> None:
         key = self._normalize_code(self._session_field(session, 'stock_code', ''))
         if key:
             self._position_cleared_confirmations.pop(key, None)
 
+    def _get_position_for_tick(self, stock_code: str, stock_code_key: str):
+        """行情检查用持仓快照: 持仓数据版本与持仓缓存对象均未变化时复用上次结果, 省去 get_position 的全表扫描
+
+        position_manager 未提供整数 data_version 时不缓存, 每次直接查询。
+        """
+        position_manager = self.position_manager
+        version = getattr(position_manager, 'data_version', None)
+        if type(version) is not int:
+            return position_manager.get_position(stock_code)
+        source = getattr(position_manager, 'positions_cache', None)
+        cached = self._position_snapshots.get(stock_code_key)
+        if cached is not None and cached[0] == version and cached[1] is source:
+            return cached[2]
+        # 版本与缓存对象均在查询前读取: 查询期间若有更新, 下次比较必然不一致而重新查询
+        position = position_manager.get_position(stock_code)
+        self._position_snapshots[stock_code_key] = (version, source, position)
+        return position
+
     def _confirm_position_cleared(self, session: GridSession) -> bool:
         key = self._normalize_code(self._session_field(session, 'stock_code', ''))
         if not key:
@@ -446,16 +675,24 @@ class GridTradingManager:
         # 内存缓存
         self.sessions: Dict[str, GridSession] = {}
         self.trackers: Dict[int, PriceTracker] = {}
-        self.level_cooldowns: Dict[tuple, float] = {}
+        self._id_to_code: Dict[int, str] = {}  # {session_id: sessions字典key} 按ID O(1)定位会话
+        self._starting_codes = set()  # 正在锁外写库创建会话的 sessions key, 防止并发重复启动
+        self.level_cooldowns = LevelCooldowns()  # {(session_id, level_price): monotonic timestamp}
         self.last_buy_times: Dict[int, float] = {}  # {session_id: timestamp} 每次成功买入后记录时间，支持 GRID_BUY_COOLDOWN
         self.last_sell_times: Dict[int, float] = {}  # {session_id: timestamp} 每次成功卖出后记录时间，支持 GRID_SELL_COOLDOWN（A-4修复）
         self.last_sell_prices: Dict[int, float] = {}  # {session_id: trigger_price} 每次成功卖出时的触发价，支持自适应冷却缩短
         self.pending_grid_orders: Dict[str, dict] = {}  # 实盘委托待成交确认: {order_id: pending_info}
         self.submitting_grid_orders: Dict[str, dict] = {}  # 锁外下单保护: {submit_id: order_plan}
         self._position_cleared_confirmations: Dict[str, int] = {}
+        self._position_snapshots: Dict[str, tuple] = {}  # {sessions key: (持仓数据版本, 持仓缓存对象, 持仓快照)}
         self.lock = threading.RLock()  # 使用可重入锁,支持嵌套调用
+        self._session_locks: Dict[int, threading.Lock] = {}  # {session_id: 会话级锁} 保护追踪器状态
         self.reconcile_lock = threading.Lock()  # 防止运行期 pending 对账并发进入
         self.last_order_reconcile_time = 0.0
+        # 启动会话时带超时查询持仓的执行器: 长期复用(线程按需创建), 超时返回时不等待卡住的查询线程
+        self._query_executor = ThreadPoolExecutor(max_workers=_POSITION_QUERY_WORKERS,
+                                                  thread_name_prefix='grid-query')
+        self._stuck_queries = set()  # 超时后仍在执行的持仓查询(完成时自动移除)
 
         # 初始化:从数据库加载活跃会话
         logger.info(f"[GRID] GridTradingManager.__init__: 初始化网格交易管理器")
@@ -465,6 +702,12 @@ class GridTradingManager:
         if pending_count:
             logger.warning(f"[GRID] GridTradingManager.__init__: 恢复 {pending_count} 个未完成网格委托，等待成交/撤废单回报")
 
+    def close(self):
+        """释放持仓查询执行器(不等待仍在进行的查询), 由程序退出清理流程调用"""
+        if self._stuck_queries:
+            logger.warning(f"[GRID] close: {len(self._stuck_queries)} 个超时的持仓查询仍未返回, 不等待其结束")
+        self._query_executor.shutdown(wait=False)
+
     def get_pnl_snapshot(self, session, current_price: float = None,
                          position_snapshot=None, ledger_summary: dict = None) -> dict:
         """返回统一的网格 PnL 快照。
@@ -609,203 +852,301 @@ class GridTradingManager:
 
         try:
             active_sessions = self.db.get_active_grid_sessions()
-            logger.info(f"[GRID] 从数据库查询到 {len(active_sessions)} 个活跃会话")
-
-            # 详细日志：打印所有查询到的会话
-            for idx, s in enumerate(active_sessions):
-                s_dict = dict(s)
-                end_time_str = s_dict.get('end_time', '')
-                # 格式化时间：只显示到秒
-                if end_time_str:
-                    try:
-                        end_time_dt = datetime.fromisoformat(end_time_str)
-                        end_time_display = end_time_dt.strftime('%Y-%m-%d %H:%M:%S')
-                    except (ValueError, TypeError) as fmt_err:
-                        logger.debug(f"[GRID] 时间格式化失败: {fmt_err}")
-                        end_time_display = end_time_str
-                else:
-                    end_time_display = 'N/A'
+            logger.info("[GRID] 从数据库查询到 %d 个活跃会话", len(active_sessions))
+
+            # CRITICAL FIX: 将sqlite3.Row转换为字典,避免"'sqlite3.Row' object has no attribute 'get'"错误
+            # 只转换一次, 明细日志与恢复循环共用
+            session_rows = [dict(row) for row in active_sessions]
+
+            # end_time 按原始值缓存解析结果: 明细日志与过期判断共用, 同批创建的会话常共享同一结束时间
+            parsed_end_times = {}
+
+            def parse_end_time(raw):
+                parsed = parsed_end_times.get(raw)
+                if parsed is None:
+                    parsed = parsed_end_times[raw] = self._as_datetime(raw)
+                return parsed
+
+            # 详细日志：打印所有查询到的会话(每个会话另有一条INFO恢复摘要, 此清单仅DEBUG输出)
+            if logger.isEnabledFor(logging.DEBUG):
+                for idx, s_dict in enumerate(session_rows):
+                    end_time_str = s_dict.get('end_time', '')
+                    # 格式化时间：只显示到秒
+                    if end_time_str:
+                        try:
+                            end_time_dt = parse_end_time(end_time_str)
+                            end_time_display = end_time_dt.strftime('%Y-%m-%d %H:%M:%S')
+                        except (ValueError, TypeError) as fmt_err:
+                            logger.debug("[GRID] 时间格式化失败: %s", fmt_err)
+                            end_time_display = end_time_str
+                    else:
+                        end_time_display = 'N/A'
 
-                logger.info(f"[GRID] 会话#{idx+1}: id={s_dict.get('id')}, "
-                           f"stock={s_dict.get('stock_code')}, "
-                           f"end_time={end_time_display}")
+                    logger.debug("[GRID] 会话#%d: id=%s, stock=%s, end_time=%s",
+                                 idx + 1, s_dict.get('id'), s_dict.get('stock_code'), end_time_display)
 
             recovered_count = 0
             stopped_count = 0
+            # 批量恢复只取一次当前时间,过期判断与剩余时长共用
+            now = datetime.now()
+            # 需停止的会话按原因收集,循环结束后单事务批量写库
+            stop_ids = {'expired': [], 'init_error': []}
 
-            for session_data in active_sessions:
-                # CRITICAL FIX: 将sqlite3.Row转换为字典,避免"'sqlite3.Row' object has no attribute 'get'"错误
-                session_dict = dict(session_data)
+            for session_dict in session_rows:
                 stock_code = session_dict['stock_code']
                 stock_code_key = self._normalize_code(stock_code)  # 用于 sessions 字典的统一 key
                 session_id = session_dict['id']
-                logger.info(f"[GRID] >>> 开始处理会话 session_id={session_id}, stock_code={stock_code}, key={stock_code_key}")
+                logger.debug("[GRID] >>> 开始处理会话 session_id=%s, stock_code=%s, key=%s",
+                             session_id, stock_code, stock_code_key)
 
                 try:
                     # 1. 检查会话是否已过期
-                    # BUG FIX: 使用session_dict而不是session_data
-                    end_time = datetime.fromisoformat(session_dict['end_time'])
-                    if datetime.now() > end_time:
-                        # 先更新数据库状态
-                        self.db.stop_grid_session(session_id, 'expired')
+                    end_time = parse_end_time(session_dict['end_time'])
+                    if now > end_time:
+                        # 数据库状态在循环结束后批量更新
+                        stop_ids['expired'].append(session_id)
 
                         # 如果内存里已有该会话，做最小清理避免Web仍显示active
                         existing = self.sessions.get(stock_code_key)
                         if existing and existing.status == 'active':
-                            logger.info(f"[GRID] 会话{session_id}({stock_code})已过期，清理内存会话")
+                            logger.info("[GRID] 会话%s(%s)已过期，清理内存会话", session_id, stock_code)
                             # 仅做最小清理：从内存移除并触发版本更新
-                            try:
-                                del self.sessions[stock_code_key]
-                            except Exception:
-                                pass
-                            if session_id in self.trackers:
-                                try:
-                                    del self.trackers[session_id]
-                                except Exception:
-                                    pass
+                            self.sessions.pop(stock_code_key, None)
+                            self._id_to_code.pop(existing.id, None)
+                            self.trackers.pop(session_id, None)
                             # 触发数据版本更新，确保前端刷新
                             try:
                                 self.position_manager._increment_data_version()
                             except Exception:
                                 pass
 
-                        logger.info(f"[GRID] 会话{session_id}({stock_code})已过期,自动停止")
+                        logger.info("[GRID] 会话%s(%s)已过期,自动停止", session_id, stock_code)
                         stopped_count += 1
                         continue
 
                     # 2. 检查持仓是否还存在（跳过以避免启动时阻塞）
                     # 修复: 启动时调用get_position可能导致阻塞30秒以上
                     # 策略: 先恢复会话,如果持仓已被清空,用户可以手动停止
-                    position = None
-                    # BUG FIX: 使用session_dict.get()而不是session_data.get()
-                    current_price = session_dict.get('current_center_price', session_dict['center_price'])
-                    logger.debug(f"[GRID] 跳过持仓检查以避免阻塞, 使用数据库价格: {current_price:.2f}")
-
-                    # 3. 恢复GridSession对象
-                    logger.debug(f"[GRID] 恢复会话对象 session_id={session_id}")
-                    session = GridSession(
-                        id=session_dict['id'],
-                        stock_code=session_dict['stock_code'],
-                        status=session_dict['status'],
-                        enabled=bool(session_dict.get('enabled', 1)),
-                        center_price=session_dict['center_price'],
-                        current_center_price=session_dict['current_center_price'],
-                        price_interval=session_dict['price_interval'],
-                        position_ratio=session_dict['position_ratio'],
-                        callback_ratio=session_dict['callback_ratio'],
-                        trade_mode=session_dict.get('trade_mode', 'amount'),
-                        fixed_volume=session_dict.get('fixed_volume', 0),
-                        max_investment=session_dict['max_investment'],
-                        current_investment=session_dict['current_investment'],
-                        max_deviation=session_dict['max_deviation'],
-                        target_profit=session_dict['target_profit'],
-                        stop_loss=session_dict['stop_loss'],
-                        trade_count=session_dict['trade_count'],
-                        buy_count=session_dict['buy_count'],
-                        sell_count=session_dict['sell_count'],
-                        total_buy_amount=session_dict['total_buy_amount'],
-                        total_sell_amount=session_dict['total_sell_amount'],
-                        total_buy_volume=session_dict.get('total_buy_volume', 0),
-                        total_sell_volume=session_dict.get('total_sell_volume', 0),
-                        start_time=datetime.fromisoformat(session_dict['start_time']),
-                        end_time=end_time
-                    )
+                    # 恢复阶段不逐会话查询持仓(避免N次持仓查询),价格统一取自数据库
+
+                    # 3. 恢复GridSession对象与PriceTracker
+                    session, tracker = self._materialize_session(session_dict, end_time)
+                    current_price = tracker.last_price
+
+                    # 4. 账本重建与资金占用校正
+                    self._reconcile_recovered_investment(session)
 
-                    # 重启恢复时重建账本，修复历史“先卖后买”未反向配对的数据。
-                    if hasattr(self.db, 'rebuild_grid_ledger_for_session'):
-                        try:
-                            ledger_rebuild = self.db.rebuild_grid_ledger_for_session(session_id)
-                            rebuilt_investment = self._safe_float(
-                                ledger_rebuild.get('current_investment'),
-                                session.current_investment
-                            )
-                            if abs(rebuilt_investment - session.current_investment) > 0.01:
-                                logger.warning(
-                                    f"[GRID] 账本重建修正资金占用 session_id={session_id} "
-                                    f"{session.current_investment:.2f} -> {rebuilt_investment:.2f}"
-                                )
-                            session.current_investment = rebuilt_investment
-                        except Exception as ledger_err:
-                            logger.warning(f"[GRID] 重启恢复时账本重建失败，保留原账本: {ledger_err}")
-
-                    # ── V2 修复：DB 加载时校验 current_investment ───────────────────────────
-                    # 场景：上次运行中买入成功但 DB 写入 current_investment 失败（磁盘/网络异常），
-                    # 重启后 current_investment 偏低，如不校正将允许超出 max_investment 的额外买入。
-                    # 保守策略：current_investment > max_investment 时，强制修正并写回 DB。
-                    if session.max_investment > 0 and session.current_investment > session.max_investment:
-                        logger.warning(
-                            f"[GRID] DB 一致性修正 session_id={session_id} "
-                            f"({session_dict['stock_code']}): "
-                            f"current_investment({session.current_investment:.2f}) > "
-                            f"max_investment({session.max_investment:.2f}), 修正为 max_investment"
-                        )
-                        session.current_investment = session.max_investment
-                        try:
-                            self.db.update_grid_session(session_id, {
-                                'current_investment': session.max_investment
-                            })
-                        except Exception as db_err:
-                            logger.warning(f"[GRID] DB 修正写回失败(可忽略，下次重启再修正): {db_err}")
                     self.sessions[stock_code_key] = session
+                    self._id_to_code[session_id] = stock_code_key
                     self._position_cleared_confirmations.pop(stock_code_key, None)
-                    # 使用数据库中保存的价格,避免在启动时调用position_manager
-                    if position and isinstance(position, dict) and position.get('current_price'):
-                        current_price = position.get('current_price')
-                    else:
-                        current_price = session.current_center_price
-                    logger.debug(f"[GRID] 创建PriceTracker session_id={session_id}, current_price={current_price:.2f}")
-                    self.trackers[session_id] = PriceTracker(
-                        session_id=session_id,
-                        last_price=current_price,
-                        peak_price=current_price,
-                        valley_price=current_price,
-                        direction=None,
-                        crossed_level=None,
-                        waiting_callback=False
-                    )
+                    self._attach_tracker(session, tracker)
 
                     # 5. 清除档位冷却
-                    cooldown_keys = [k for k in self.level_cooldowns.keys() if k[0] == session_id]
-                    if cooldown_keys:
-                        logger.debug(f"[GRID] 清除 {len(cooldown_keys)} 个档位冷却记录")
-                    for key in cooldown_keys:
-                        del self.level_cooldowns[key]
+                    cleared = self.level_cooldowns.drop_session(session_id)
+                    if cleared:
+                        logger.debug("[GRID] 清除 %d 个档位冷却记录", cleared)
 
                     # 6. 记录恢复信息（简化版，避免调用get_profit_ratio导致阻塞）
-                    logger.info(f"[GRID] 恢复会话: {stock_code}")
-                    logger.info(f"[GRID]   - 会话ID: {session_id}")
-                    logger.info(f"[GRID]   - 原始中心价: {session.center_price:.2f}元(锁定)")
-                    logger.info(f"[GRID]   - 当前中心价: {session.current_center_price:.2f}元")
-                    logger.info(f"[GRID]   - 当前市价: {current_price:.2f}元")
-                    logger.info(f"[GRID]   - 累计交易: {session.trade_count}次(买{session.buy_count}/卖{session.sell_count})")
-                    # 简化：不调用get_profit_ratio()避免递归日志调用
-                    logger.info(f"[GRID]   - 网格盈亏: 计算中...")
-                    logger.info(f"[GRID]   - 追踪器状态: 已重置(安全模式)")
-
-                    levels = session.get_grid_levels()
-                    logger.info(f"[GRID]   - 网格档位: {levels['lower']:.2f} / {levels['center']:.2f} / {levels['upper']:.2f}")
-
-                    remaining_days = (end_time - datetime.now()).days
-                    logger.info(f"[GRID]   - 剩余时长: {remaining_days}天")
+                    # 合并为一条多行日志: 延迟格式化, 且每个会话只进入一次日志处理器
+                    # 日志级别高于INFO时连同档位/剩余天数的计算一起跳过
+                    if logger.isEnabledFor(logging.INFO):
+                        levels = session.get_grid_levels()
+                        remaining_days = (end_time - now).days
+                        logger.info(
+                            "[GRID] 恢复会话: %s\n"
+                            "[GRID]   - 会话ID: %s\n"
+                            "[GRID]   - 原始中心价: %.2f元(锁定)\n"
+                            "[GRID]   - 当前中心价: %.2f元\n"
+                            "[GRID]   - 当前市价: %.2f元\n"
+                            "[GRID]   - 累计交易: %d次(买%d/卖%d)\n"
+                            "[GRID]   - 网格盈亏: 计算中...\n"
+                            "[GRID]   - 追踪器状态: 已重置(安全模式)\n"
+                            "[GRID]   - 网格档位: %.2f / %.2f / %.2f\n"
+                            "[GRID]   - 剩余时长: %d天",
+                            stock_code, session_id, session.center_price, session.current_center_price,
+                            current_price, session.trade_count, session.buy_count, session.sell_count,
+                            levels.lower, levels.center, levels.upper, remaining_days
+                        )
 
                     recovered_count += 1
 
                 except Exception as e:
-                    logger.error(f"[GRID] 恢复会话{session_id}失败: {str(e)}, 自动停止会话")
-                    try:
-                        self.db.stop_grid_session(session_id, 'init_error')
-                        stopped_count += 1
-                    except:
-                        pass
+                    logger.error("[GRID] 恢复会话%s失败: %s, 自动停止会话", session_id, e)
+                    stop_ids['init_error'].append(session_id)
+                    stopped_count += 1
+
+            if stopped_count:
+                try:
+                    self.db.stop_grid_sessions_bulk(stop_ids)
+                except Exception as stop_err:
+                    logger.error("[GRID] 批量停止会话失败: %s", stop_err)
 
-            logger.info(f"[GRID] 网格会话恢复完成: 恢复{recovered_count}个, 自动停止{stopped_count}个")
+            logger.info("[GRID] 网格会话恢复完成: 恢复%d个, 自动停止%d个", recovered_count, stopped_count)
 
             return recovered_count
 
         except Exception as e:
-            logger.error(f"[GRID] 加载活跃会话失败: {str(e)}")
+            logger.error("[GRID] 加载活跃会话失败: %s", e)
             return 0
 
+    def _materialize_session(self, row: dict, end_time: datetime):
+        """由数据库行构建 GridSession 与 PriceTracker（纯内存操作, 无I/O）
+
+        追踪器默认重置; 启用 GRID_TRACKER_RESTORE_MAX_AGE 且行内快照有效时恢复等待回调状态。
+
+        Returns:
+            (GridSession, PriceTracker)
+        """
+        session_id = row['id']
+        logger.debug("[GRID] 恢复会话对象 session_id=%s", session_id)
+        session = GridSession(
+            **{k: row[k] for k in _SESSION_ROW_FIELDS if k in row},
+            start_time=self._as_datetime(row['start_time']),
+            end_time=end_time
+        )
+        session.enabled = bool(session.enabled)
+
+        # 使用数据库中保存的价格,避免在启动时调用position_manager
+        current_price = session.current_center_price
+        logger.debug("[GRID] 创建PriceTracker session_id=%s, current_price=%.2f", session_id, current_price)
+        tracker = PriceTracker(
+            session_id=session_id,
+            last_price=current_price,
+            peak_price=current_price,
+            valley_price=current_price,
+            direction=DIR_NONE,
+            crossed_level=None,
+            waiting_callback=False
+        )
+        self._restore_tracker_state(session, tracker, row)
+        return session, tracker
+
+    @staticmethod
+    def _tracker_state(tracker: PriceTracker) -> tuple:
+        return (tracker.last_price, tracker.peak_price, tracker.valley_price,
+                tracker.direction, tracker.waiting_callback, tracker.crossed_level)
+
+    def _restore_tracker_state(self, session: GridSession, tracker: PriceTracker, row: dict) -> bool:
+        """按数据库快照恢复等待回调状态(未启用、快照过旧或网格已重建时保持重置状态)"""
+        max_age = config.GRID_TRACKER_RESTORE_MAX_AGE
+        if max_age <= 0 or not row.get('tracker_waiting_callback') or not row.get('tracker_updated_at'):
+            return False
+        try:
+            age = (datetime.now() - self._as_datetime(row['tracker_updated_at'])).total_seconds()
+        except (ValueError, TypeError):
+            return False
+        if not 0 <= age <= max_age:
+            logger.info("[GRID] 追踪器快照已过期 session_id=%s, age=%.0fs, 保守重置", session.id, age)
+            return False
+
+        # 快照中的穿越档位须与当前网格档位一致, 否则快照之后已成交并重建网格
+        direction = int(row.get('tracker_direction') or DIR_NONE)
+        crossed_level = row.get('tracker_crossed_level')
+        levels = session.get_grid_levels()
+        if direction == DIR_RISING:
+            expected_level = levels.upper
+        elif direction == DIR_FALLING:
+            expected_level = levels.lower
+        else:
+            return False
+        if crossed_level is None or _level_tick(crossed_level) != _level_tick(expected_level):
+            logger.info("[GRID] 追踪器快照档位与当前网格不一致 session_id=%s, 保守重置", session.id)
+            return False
+
+        tracker.last_price = self._safe_float(row.get('tracker_last_price'), tracker.last_price)
+        tracker.peak_price = self._safe_float(row.get('tracker_peak_price'), tracker.peak_price)
+        tracker.valley_price = self._safe_float(row.get('tracker_valley_price'), tracker.valley_price)
+        tracker.direction = direction
+        tracker.crossed_level = expected_level
+        tracker.waiting_callback = True
+        session._tracker_saved = self._tracker_state(tracker)
+        session._tracker_saved_at = time.monotonic()
+        logger.info("[GRID] 恢复追踪器快照 session_id=%s, direction=%s, crossed_level=%.2f, "
+                    "peak=%.2f, valley=%.2f, age=%.0fs",
+                    session.id, tracker.direction_name, expected_level,
+                    tracker.peak_price, tracker.valley_price, age)
+        return True
+
+    def _tracker_state_to_persist(self, session: GridSession, tracker: PriceTracker) -> Optional[tuple]:
+        """取需写库的追踪器快照(调用者持有会话锁): 等待回调状态变化时立即写入, 等待期间按间隔节流写入
+
+        Returns:
+            需写入的快照, 无需写入时返回None; 写库由 _persist_tracker_state 在释放会话锁后执行
+        """
+        if config.GRID_TRACKER_RESTORE_MAX_AGE <= 0:
+            return None
+        waiting = tracker.waiting_callback
+        saved = session._tracker_saved
+        if saved is None:
+            if not waiting:
+                return None
+        elif saved[4] == waiting:
+            if not waiting:
+                return None
+            if time.monotonic() - session._tracker_saved_at < config.GRID_TRACKER_PERSIST_INTERVAL:
+                return None
+        state = self._tracker_state(tracker)
+        if state == saved:
+            return None
+        return state
+
+    def _persist_tracker_state(self, session: GridSession, state: tuple) -> None:
+        """追踪器快照写库(无需持有锁, 磁盘写入不阻塞本会话的行情处理与成交回调)"""
+        try:
+            self.db.save_tracker_state(session.id, {
+                'last_price': state[0],
+                'peak_price': state[1],
+                'valley_price': state[2],
+                'direction': state[3],
+                'waiting_callback': state[4],
+                'crossed_level': state[5],
+            })
+        except Exception as e:
+            logger.warning(f"[GRID] _persist_tracker_state: session_id={session.id} 追踪器快照写库失败: {e}")
+            return
+        session._tracker_saved = state
+        session._tracker_saved_at = time.monotonic()
+
+    def _reconcile_recovered_investment(self, session: GridSession):
+        """重启恢复时重建账本并校正 current_investment"""
+        session_id = session.id
+
+        # 重启恢复时重建账本，修复历史“先卖后买”未反向配对的数据。
+        if hasattr(self.db, 'rebuild_grid_ledger_for_session'):
+            try:
+                ledger_rebuild = self.db.rebuild_grid_ledger_for_session(session_id)
+                rebuilt_investment = self._safe_float(
+                    ledger_rebuild.get('current_investment'),
+                    session.current_investment
+                )
+                if abs(rebuilt_investment - session.current_investment) > 0.01:
+                    logger.warning(
+                        f"[GRID] 账本重建修正资金占用 session_id={session_id} "
+                        f"{session.current_investment:.2f} -> {rebuilt_investment:.2f}"
+                    )
+                session.current_investment = rebuilt_investment
+            except Exception as ledger_err:
+                logger.warning(f"[GRID] 重启恢复时账本重建失败，保留原账本: {ledger_err}")
+
+        # ── V2 修复：DB 加载时校验 current_investment ───────────────────────────
+        # 场景：上次运行中买入成功但 DB 写入 current_investment 失败（磁盘/网络异常），
+        # 重启后 current_investment 偏低，如不校正将允许超出 max_investment 的额外买入。
+        # 保守策略：current_investment > max_investment 时，强制修正并写回 DB。
+        if session.max_investment > 0 and session.current_investment > session.max_investment:
+            logger.warning(
+                f"[GRID] DB 一致性修正 session_id={session_id} "
+                f"({session.stock_code}): "
+                f"current_investment({session.current_investment:.2f}) > "
+                f"max_investment({session.max_investment:.2f}), 修正为 max_investment"
+            )
+            session.current_investment = session.max_investment
+            try:
+                self.db.update_grid_session(session_id, {
+                    'current_investment': session.max_investment
+                })
+            except Exception as db_err:
+                logger.warning(f"[GRID] DB 修正写回失败(可忽略，下次重启再修正): {db_err}")
+
     def _load_open_grid_orders(self) -> int:
         """系统启动时恢复尚未终结的网格委托"""
         if not hasattr(self.db, 'get_open_grid_orders'):
@@ -953,9 +1294,9 @@ class GridTradingManager:
             return None
         if not getattr(config, 'GRID_CONFIRM_LIVE_ORDER_BY_DEAL', True):
             return None
-        with self.lock:
-            if not self.pending_grid_orders:
-                return None
+        # 每个行情tick都会经过此处: 无锁判空(读取dict长度在GIL下是原子的)
+        if not self.pending_grid_orders:
+            return None
 
         interval = float(getattr(config, 'GRID_ORDER_RECONCILE_INTERVAL', 15))
         if not force and interval <= 0:
@@ -1206,31 +1547,41 @@ class GridTradingManager:
         """启动网格交易会话（三阶段设计，避免AB-BA死锁）
 
         阶段1（锁外）：获取持仓数据并验证前置条件
-        阶段2（锁内）：停止旧session、创建数据库记录、创建内存对象
+        阶段2（锁内检查占位 → 锁外创建数据库记录 → 锁内创建内存对象）
         阶段3（锁外）：触发数据版本更新、打印成功日志
         """
-        logger.info(f"[GRID] start_grid_session: ========== 开始启动会话 ==========")
-        logger.info(f"[GRID] start_grid_session: stock_code={stock_code}")
-        logger.debug(f"[GRID] start_grid_session: user_config={user_config}")
+        logger.info("[GRID] start_grid_session: ========== 开始启动会话 ==========")
+        logger.info("[GRID] start_grid_session: stock_code=%s", stock_code)
+        logger.debug("[GRID] start_grid_session: user_config=%s", user_config)
         # 统一 sessions 字典 key（去除交易所后缀）
         stock_code_key = self._normalize_code(stock_code)
-        logger.info(f"[GRID] start_grid_session: stock_code_key={stock_code_key}")
+        logger.info("[GRID] start_grid_session: stock_code_key=%s", stock_code_key)
 
         # ========== 阶段1: 锁外操作 - 获取持仓数据并验证 ==========
-        logger.info(f"[GRID] start_grid_session: [阶段1] 获取持仓数据（锁外）...")
+        logger.info("[GRID] start_grid_session: [阶段1] 获取持仓数据（锁外）...")
 
-        # 使用ThreadPoolExecutor + 5秒超时避免阻塞
+        # 复用执行器 + 超时避免阻塞(不用 with 临时创建: 其退出时会等待卡住的查询, 使超时失效)
         position = None
-        with ThreadPoolExecutor(max_workers=1) as executor:
-            try:
-                future = executor.submit(self.position_manager.get_position, stock_code)
-                position = future.result(timeout=config.GRID_POSITION_QUERY_TIMEOUT)
-            except TimeoutError:
-                logger.error(f"[GRID] start_grid_session: [阶段1] 获取持仓超时({config.GRID_POSITION_QUERY_TIMEOUT}秒)，拒绝启动")
-                raise RuntimeError(f"获取{stock_code}持仓信息超时，请稍后重试")
-            except Exception as e:
-                logger.error(f"[GRID] start_grid_session: [阶段1] 获取持仓失败: {str(e)}")
-                raise
+        try:
+            future = self._query_executor.submit(self.position_manager.get_position, stock_code)
+            position = future.result(timeout=config.GRID_POSITION_QUERY_TIMEOUT)
+        except TimeoutError:
+            if not future.cancel():
+                # 查询已在执行, 无法取消: 占用一个工作线程直到 get_position 返回
+                self._stuck_queries.add(future)
+                future.add_done_callback(self._stuck_queries.discard)
+                stuck = len(self._stuck_queries)
+                if stuck >= _POSITION_QUERY_WORKERS:
+                    logger.error(f"[GRID] start_grid_session: [阶段1] 持仓查询工作线程已全部被未返回的查询占用"
+                                 f"({stuck}/{_POSITION_QUERY_WORKERS}), 后续启动会话将排队直至超时")
+                else:
+                    logger.warning(f"[GRID] start_grid_session: [阶段1] 超时的持仓查询仍在执行, "
+                                   f"占用工作线程 {stuck}/{_POSITION_QUERY_WORKERS}")
+            logger.error(f"[GRID] start_grid_session: [阶段1] 获取持仓超时({config.GRID_POSITION_QUERY_TIMEOUT}秒)，拒绝启动")
+            raise RuntimeError(f"获取{stock_code}持仓信息超时，请稍后重试")
+        except Exception as e:
+            logger.error(f"[GRID] start_grid_session: [阶段1] 获取持仓失败: {str(e)}")
+            raise
 
         # 验证持仓条件
         if not position:
@@ -1242,7 +1593,8 @@ class GridTradingManager:
             logger.warning(f"[GRID] start_grid_session: [阶段1] {stock_code}未触发止盈, 拒绝启动 (GRID_REQUIRE_PROFIT_TRIGGERED=True)")
             raise ValueError(f"{stock_code}未触发止盈（未触发首次止盈），无法启动网格交易")
 
-        logger.debug(f"[GRID] start_grid_session: [阶段1] 前置条件验证通过, volume={position.get('volume')}, profit_triggered={position.get('profit_triggered')}")
+        logger.debug("[GRID] start_grid_session: [阶段1] 前置条件验证通过, volume=%s, profit_triggered=%s",
+                     position.get('volume'), position.get('profit_triggered'))
 
         # 确定中心价格
         user_center_price = user_config.get('center_price')
@@ -1250,10 +1602,10 @@ class GridTradingManager:
 
         if user_center_price and user_center_price > 0:
             center_price = user_center_price
-            logger.info(f"[GRID] start_grid_session: [阶段1] 使用用户自定义中心价格: {center_price:.2f}")
+            logger.info("[GRID] start_grid_session: [阶段1] 使用用户自定义中心价格: %.2f", center_price)
         elif highest_price > 0:
             center_price = highest_price
-            logger.info(f"[GRID] start_grid_session: [阶段1] 使用历史最高价作为中心价格: {center_price:.2f}")
+            logger.info("[GRID] start_grid_session: [阶段1] 使用历史最高价作为中心价格: %.2f", center_price)
         else:
             logger.warning(f"[GRID] start_grid_session: [阶段1] 缺少有效的中心价格, 拒绝启动")
             raise ValueError(f"{stock_code}缺少有效的中心价格")
@@ -1270,11 +1622,11 @@ class GridTradingManager:
         # 固定股数模式且用户未指定股数：默认按 当前持仓总数 × 每档比例 兜底计算(对齐100股)
         if trade_mode == 'shares' and fixed_volume <= 0:
             holding_volume = int(position.get('volume', 0) or 0)
-            fixed_volume = (int(holding_volume * _position_ratio) // 100) * 100
+            fixed_volume = _floor_to_lot(holding_volume * _position_ratio)
             if fixed_volume < 100:
                 fixed_volume = 100
-            logger.info(f"[GRID] start_grid_session: [阶段1] 固定股数模式未指定股数, "
-                        f"按持仓{holding_volume}×{_position_ratio*100:.0f}%兜底={fixed_volume}股")
+            logger.info("[GRID] start_grid_session: [阶段1] 固定股数模式未指定股数, "
+                        "按持仓%d×%.0f%%兜底=%d股", holding_volume, _position_ratio * 100, fixed_volume)
 
         session_data = {
             'stock_code': stock_code,
@@ -1293,26 +1645,46 @@ class GridTradingManager:
             'risk_level': user_config.get('risk_level', 'moderate'),
             'template_name': user_config.get('template_name')
         }
-        logger.info(f"[GRID] start_grid_session: [阶段1] 完成，预构建会话数据完成")
+        logger.info("[GRID] start_grid_session: [阶段1] 完成，预构建会话数据完成")
 
         # ========== 阶段2: 锁内操作 - 停止旧session、创建记录 ==========
-        logger.info(f"[GRID] start_grid_session: [阶段2] 尝试获取锁...")
+        logger.info("[GRID] start_grid_session: [阶段2] 尝试获取锁...")
         lock_acquired = self.lock.acquire(timeout=config.GRID_LOCK_ACQUIRE_TIMEOUT)
         if not lock_acquired:
             logger.error(f"[GRID] start_grid_session: [阶段2] 获取锁超时({config.GRID_LOCK_ACQUIRE_TIMEOUT}秒)! 拒绝启动")
             raise RuntimeError(f"网格交易启动失败：系统繁忙，请稍后重试")
 
-        logger.info(f"[GRID] start_grid_session: [阶段2] 成功获取锁，开始处理...")
-        session = None
+        logger.info("[GRID] start_grid_session: [阶段2] 成功获取锁，开始处理...")
         try:
-            # 检查并停止旧session
-            if stock_code_key in self.sessions:
+            # 检查重复启动, 并占位防止写库期间同一股票被并发启动
+            if stock_code_key in self.sessions or stock_code_key in self._starting_codes:
                 raise ValueError(f"{stock_code}已存在活跃会话，请先停止当前会话")
+            self._starting_codes.add(stock_code_key)
+        finally:
+            self.lock.release()
 
-            # 创建数据库记录
+        try:
+            # 创建数据库记录(锁外执行, 磁盘写入不阻塞其他会话的行情检查)
             session_id = self.db.create_grid_session(session_data)
-            logger.debug(f"[GRID] start_grid_session: [阶段2] 数据库创建成功, session_id={session_id}")
+            logger.debug("[GRID] start_grid_session: [阶段2] 数据库创建成功, session_id=%s", session_id)
+        except Exception:
+            with self.lock:
+                self._starting_codes.discard(stock_code_key)
+            raise
+
+        lock_acquired = self.lock.acquire(timeout=config.GRID_LOCK_ACQUIRE_TIMEOUT)
+        if not lock_acquired:
+            logger.error(f"[GRID] start_grid_session: [阶段2] 写库后获取锁超时({config.GRID_LOCK_ACQUIRE_TIMEOUT}秒)! 停止已创建的会话记录")
+            try:
+                self.db.stop_grid_session(session_id, 'start_lock_timeout')
+            except Exception as db_err:
+                logger.error(f"[GRID] start_grid_session: 停止会话记录失败 session_id={session_id}, err={db_err}")
+            # 未取得锁, 依赖 set.discard 的原子性释放占位, 允许稍后重试
+            self._starting_codes.discard(stock_code_key)
+            raise RuntimeError(f"网格交易启动失败：系统繁忙，请稍后重试")
 
+        try:
+            self._starting_codes.discard(stock_code_key)
             # 创建内存对象
             session = GridSession(
                 id=session_id,
@@ -1334,38 +1706,48 @@ class GridTradingManager:
                 end_time=end_time
             )
             self.sessions[stock_code_key] = session
+            self._id_to_code[session_id] = stock_code_key
             self._position_cleared_confirmations.pop(stock_code_key, None)
-            logger.debug(f"[GRID] start_grid_session: [阶段2] 内存会话对象创建完成")
+            logger.debug("[GRID] start_grid_session: [阶段2] 内存会话对象创建完成")
 
             # 创建PriceTracker
-            self.trackers[session_id] = PriceTracker(
+            self._attach_tracker(session, PriceTracker(
                 session_id=session_id,
                 last_price=current_price,
                 peak_price=current_price,
                 valley_price=current_price
-            )
-            logger.debug(f"[GRID] start_grid_session: [阶段2] PriceTracker创建完成, current_price={current_price:.2f}")
-
+            ))
+            logger.debug("[GRID] start_grid_session: [阶段2] PriceTracker创建完成, current_price=%.2f", current_price)
         finally:
             self.lock.release()
-            logger.info(f"[GRID] start_grid_session: [阶段2] 已释放锁")
+
+        logger.info("[GRID] start_grid_session: [阶段2] 已释放锁")
 
         # ========== 阶段3: 锁外操作 - 后处理 ==========
-        logger.info(f"[GRID] start_grid_session: [阶段3] 执行后处理...")
+        logger.info("[GRID] start_grid_session: [阶段3] 执行后处理...")
 
         # 触发数据版本更新
         self.position_manager._increment_data_version()
 
         # 打印成功日志
         levels = session.get_grid_levels()
-        logger.info(f"[GRID] start_grid_session: ========== 启动成功 ==========")
-        logger.info(f"[GRID] start_grid_session: 股票代码={stock_code}, 会话ID={session.id}")
-        logger.info(f"[GRID] start_grid_session: 中心价={highest_price:.2f}, 档位间隔={session.price_interval*100:.1f}%")
-        logger.info(f"[GRID] start_grid_session: 网格档位 lower={levels['lower']:.2f}, center={levels['center']:.2f}, upper={levels['upper']:.2f}")
-        logger.info(f"[GRID] start_grid_session: 最大投入={session.max_investment:.2f}, 持仓比例={session.position_ratio*100:.1f}%")
-        logger.info(f"[GRID] start_grid_session: 回调比例={session.callback_ratio*100:.2f}%, 最大偏离={session.max_deviation*100:.1f}%")
-        logger.info(f"[GRID] start_grid_session: 目标盈利={session.target_profit*100:.1f}%, 止损={session.stop_loss*100:.1f}%")
-        logger.info(f"[GRID] start_grid_session: 有效期至 {end_time.strftime('%Y-%m-%d %H:%M:%S')}")
+        logger.info(
+            "[GRID] start_grid_session: ========== 启动成功 ==========\n"
+            "[GRID] start_grid_session: 股票代码=%s, 会话ID=%s\n"
+            "[GRID] start_grid_session: 中心价=%.2f, 档位间隔=%.1f%%\n"
+            "[GRID] start_grid_session: 网格档位 lower=%.2f, center=%.2f, upper=%.2f\n"
+            "[GRID] start_grid_session: 最大投入=%.2f, 持仓比例=%.1f%%\n"
+            "[GRID] start_grid_session: 回调比例=%.2f%%, 最大偏离=%.1f%%\n"
+            "[GRID] start_grid_session: 目标盈利=%.1f%%, 止损=%.1f%%\n"
+            "[GRID] start_grid_session: 有效期至 %s",
+            stock_code, session.id,
+            highest_price, session.price_interval * 100,
+            levels.lower, levels.center, levels.upper,
+            session.max_investment, session.position_ratio * 100,
+            session.callback_ratio * 100, session.max_deviation * 100,
+            session.target_profit * 100, session.stop_loss * 100,
+            end_time.strftime('%Y-%m-%d %H:%M:%S')
+        )
 
         return session
 
@@ -1428,6 +1810,7 @@ class GridTradingManager:
                     f"待撤单={len(open_orders)}, 提交中={len(submitting_orders)}"
                 )
             else:
+                # 先写库再清理内存: 写库失败时会话仍保留在内存中, 数据库也仍为active
                 return self._stop_grid_session_unlocked(session_id, reason)
 
         cancel_ok = 0
@@ -1504,13 +1887,45 @@ class GridTradingManager:
                 'status': session.status
             }
 
+    def sessions_snapshot(self) -> tuple:
+        """返回活跃会话的只读快照 ((sessions key, GridSession), ...)
+
+        供Web查询等只读场景无锁遍历: tuple(dict.items()) 在GIL下一次性完成拷贝,
+        遍历期间其他线程增删会话不会引发 "dictionary changed size during iteration"。
+        """
+        return tuple(self.sessions.items())
+
     def _find_session_by_id(self, session_id: int) -> Optional[GridSession]:
         """按会话ID查找内存会话。"""
-        for s in self.sessions.values():
+        stock_code_key = self._id_to_code.get(session_id)
+        if stock_code_key is not None:
+            session = self.sessions.get(stock_code_key)
+            if session is not None and session.id == session_id:
+                return session
+
+        # 索引未命中(如会话被直接写入sessions): 回退扫描并补全索引
+        for key, s in self.sessions.items():
             if s.id == session_id:
+                self._id_to_code[session_id] = key
                 return s
         return None
 
+    def _session_lock(self, session_id: int) -> threading.Lock:
+        """获取会话级锁, 保护该会话的价格追踪器状态
+
+        锁顺序约定: 需要同时持有时先全局锁(self.lock)再会话锁, 持有会话锁时不得再请求全局锁。
+        """
+        lock = self._session_locks.get(session_id)
+        if lock is None:
+            lock = self._session_locks.setdefault(session_id, threading.Lock())
+        return lock
+
+    def _attach_tracker(self, session: GridSession, tracker: PriceTracker) -> PriceTracker:
+        """登记价格追踪器并绑定到会话（调用者必须已持有锁）"""
+        self.trackers[session.id] = tracker
+        session.tracker = tracker
+        return tracker
+
     def _cancel_grid_order(self, order_id: str) -> bool:
         """锁外发起网格委托撤单请求。"""
         order_id = str(order_id)
@@ -1561,9 +1976,37 @@ class GridTradingManager:
             logger.warning(f"[GRID] _stop_grid_session_unlocked: 会话{session_id}不存在, 无法停止")
             raise ValueError(f"会话{session_id}不存在")
 
+        # 先写库再清理内存: 写库失败时会话仍保留在内存中
+        self._persist_session_stop(session_id, self._session_stats_updates(session), reason)
+        return self._detach_grid_session_unlocked(session, reason)
+
+    @staticmethod
+    def _session_stats_updates(session: GridSession) -> dict:
+        """停止会话时需同步到数据库的统计字段"""
+        return {
+            'trade_count': session.trade_count,
+            'buy_count': session.buy_count,
+            'sell_count': session.sell_count,
+            'total_buy_amount': session.total_buy_amount,
+            'total_sell_amount': session.total_sell_amount,
+            'current_investment': session.current_investment
+        }
+
+    def _persist_session_stop(self, session_id: int, updates: dict, reason: str):
+        """将停止会话写入数据库(统计信息与停止状态同一条UPDATE写入), 无需持有锁"""
+        self.db.stop_grid_session(session_id, reason, updates)
+        logger.debug(f"[GRID] _persist_session_stop: 数据库更新完成 session_id={session_id}")
+
+    def _detach_grid_session_unlocked(self, session: GridSession, reason: str):
+        """从内存移除会话并清理关联状态（调用者必须已持有锁）
+
+        Returns:
+            final_stats
+        """
+        session_id = session.id
         stock_code = session.stock_code
         stock_code_key = self._normalize_code(stock_code)  # 用于 sessions 字典操作
-        logger.debug(f"[GRID] _stop_grid_session_unlocked: 找到会话 stock_code={stock_code}, key={stock_code_key}")
+        logger.debug(f"[GRID] _detach_grid_session_unlocked: 找到会话 stock_code={stock_code}, key={stock_code_key}")
 
         pnl_snapshot = self.get_pnl_snapshot(
             session,
@@ -1571,7 +2014,7 @@ class GridTradingManager:
         )
 
         # 记录停止前的统计信息
-        logger.info(f"[GRID] _stop_grid_session_unlocked: 停止前统计:")
+        logger.info(f"[GRID] _detach_grid_session_unlocked: 停止前统计:")
         logger.info(f"[GRID]   - 股票代码: {stock_code}")
         logger.info(f"[GRID]   - 总交易次数: {session.trade_count} (买入{session.buy_count}/卖出{session.sell_count})")
         logger.info(f"[GRID]   - 总买入金额: {session.total_buy_amount:.2f}")
@@ -1585,51 +2028,33 @@ class GridTradingManager:
         logger.info(f"[GRID]   - 当前投入: {session.current_investment:.2f}/{session.max_investment:.2f}")
         logger.info(f"[GRID]   - 中心价偏离: {session.get_deviation_ratio()*100:.2f}%")
 
-        # 同步内存中的统计信息到数据库
-        if stock_code_key in self.sessions:
-            session_obj = self.sessions[stock_code_key]
-            updates = {
-                'trade_count': session_obj.trade_count,
-                'buy_count': session_obj.buy_count,
-                'sell_count': session_obj.sell_count,
-                'total_buy_amount': session_obj.total_buy_amount,
-                'total_sell_amount': session_obj.total_sell_amount,
-                'current_investment': session_obj.current_investment
-            }
-            self.db.update_grid_session(session_id, updates)
-            logger.debug(f"[GRID] _stop_grid_session_unlocked: 同步统计信息到数据库完成")
-
-        # 更新数据库
-        self.db.stop_grid_session(session_id, reason)
-        logger.debug(f"[GRID] _stop_grid_session_unlocked: 数据库更新完成")
-
         # 从内存中移除
-        if stock_code_key in self.sessions:
-            del self.sessions[stock_code_key]
-            logger.debug(f"[GRID] _stop_grid_session_unlocked: 从sessions中移除 {stock_code} (key={stock_code_key})")
+        if self.sessions.pop(stock_code_key, None) is not None:
+            logger.debug(f"[GRID] _detach_grid_session_unlocked: 从sessions中移除 {stock_code} (key={stock_code_key})")
+        self._id_to_code.pop(session_id, None)
         self._position_cleared_confirmations.pop(stock_code_key, None)
-        if session_id in self.trackers:
-            del self.trackers[session_id]
-            logger.debug(f"[GRID] _stop_grid_session_unlocked: 从trackers中移除 session_id={session_id}")
+        self._position_snapshots.pop(stock_code_key, None)
+        if self.trackers.pop(session_id, None) is not None:
+            logger.debug(f"[GRID] _detach_grid_session_unlocked: 从trackers中移除 session_id={session_id}")
+        session.tracker = None
+        self._session_locks.pop(session_id, None)
 
         # 清除冷却记录 (键格式为 (session_id: int, level_price: float))
-        cooldown_keys = [k for k in self.level_cooldowns.keys() if k[0] == session_id]
-        if cooldown_keys:
-            logger.debug(f"[GRID] _stop_grid_session_unlocked: 清除 {len(cooldown_keys)} 个档位冷却记录")
-        for key in cooldown_keys:
-            del self.level_cooldowns[key]
+        cleared = self.level_cooldowns.drop_session(session_id)
+        if cleared:
+            logger.debug(f"[GRID] _detach_grid_session_unlocked: 清除 {cleared} 个档位冷却记录")
 
         # 触发数据版本更新
         self.position_manager._increment_data_version()
 
         # ⭐ P0-2修复：清除该股票的网格信号，避免会话停止后信号仍在执行
         with self.position_manager.signal_lock:
-            if stock_code in self.position_manager.latest_signals:
-                signal_info = self.position_manager.latest_signals[stock_code]
+            signal_info = self.position_manager.latest_signals.get(stock_code)
+            if signal_info:
                 signal_type = signal_info.get('type', '')
                 if signal_type.startswith('grid_'):
                     logger.info(f"[GRID] 会话停止，清除 {stock_code} 的网格信号: {signal_type}")
-                    del self.position_manager.latest_signals[stock_code]
+                    self.position_manager.latest_signals.pop(stock_code, None)
 
         final_stats = {
             'stock_code': stock_code,
@@ -1639,7 +2064,7 @@ class GridTradingManager:
             'stop_reason': reason
         }
 
-        logger.info(f"[GRID] _stop_grid_session_unlocked: 停止完成! stock_code={stock_code}, reason={reason}, "
+        logger.info(f"[GRID] _detach_grid_session_unlocked: 停止完成! stock_code={stock_code}, reason={reason}, "
                    f"trade_count={session.trade_count}, profit={pnl_snapshot['profit_ratio']*100:.2f}%")
 
         return final_stats
@@ -1656,24 +2081,30 @@ class GridTradingManager:
             position_snapshot: 可选的持仓快照（锁外预取，避免锁内调用外部依赖）。
                                若为 None，则在方法内部直接调用 get_position()（向后兼容）。
         """
-        logger.debug(f"[GRID] _check_exit_conditions: session_id={session.id}, stock_code={session.stock_code}, current_price={current_price:.2f}")
+        # 每个tick都会调用: 调试日志在DEBUG关闭时跳过格式化与百分比换算
+        debug_enabled = logger.isEnabledFor(logging.DEBUG)
+        if debug_enabled:
+            logger.debug("[GRID] _check_exit_conditions: session_id=%s, stock_code=%s, current_price=%.2f",
+                         session.id, session.stock_code, current_price)
 
         # 1. 偏离度检测（双重保护）
-        if session.current_center_price and session.center_price:
+        # 除数已在此处判零, 两个偏离度直接以局部变量计算(与 get_deviation_ratio 口径一致)
+        center_price = session.center_price
+        current_center = session.current_center_price
+        if current_center and center_price:
+            max_deviation = session.max_deviation
             # 网格漂移偏离：current_center 相对 initial_center 的偏移（多次同向交易后累计）
-            drift_deviation = session.get_deviation_ratio()
+            drift_deviation = abs(current_center - center_price) / center_price
             # 市价偏离：当前市价相对 current_center 的距离（捕捉单边行情未触发信号的情形）
-            market_deviation = abs(current_price - session.current_center_price) / session.current_center_price
-            deviation = max(drift_deviation, market_deviation)
-            logger.debug(
-                f"[GRID] _check_exit_conditions: 偏离度检测 "
-                f"drift={drift_deviation*100:.2f}%, market={market_deviation*100:.2f}%, "
-                f"max={session.max_deviation*100:.2f}%"
-            )
-            if deviation > session.max_deviation:
+            market_deviation = abs(current_price - current_center) / current_center
+            deviation = drift_deviation if drift_deviation > market_deviation else market_deviation
+            if debug_enabled:
+                logger.debug("[GRID] _check_exit_conditions: 偏离度检测 drift=%.2f%%, market=%.2f%%, max=%.2f%%",
+                             drift_deviation * 100, market_deviation * 100, max_deviation * 100)
+            if deviation > max_deviation:
                 logger.warning(
                     f"[GRID] _check_exit_conditions: {session.stock_code} "
-                    f"偏离度{deviation*100:.2f}%超过限制{session.max_deviation*100:.2f}% "
+                    f"偏离度{deviation*100:.2f}%超过限制{max_deviation*100:.2f}% "
                     f"(drift={drift_deviation*100:.2f}%, market={market_deviation*100:.2f}%), 触发退出"
                 )
                 return 'deviation'
@@ -1702,10 +2133,11 @@ class GridTradingManager:
                 ledger_summary=ledger_summary
             )
             profit_ratio = pnl_snapshot['profit_ratio']
-            logger.debug(f"[GRID] _check_exit_conditions: profit_ratio={profit_ratio*100:.2f}% "
-                        f"method={pnl_snapshot['method_detail']}, "
-                        f"target={session.target_profit*100:.2f}%, stop_loss={session.stop_loss*100:.2f}%, "
-                        f"buy_count={session.buy_count}, sell_count={session.sell_count}")
+            if debug_enabled:
+                logger.debug("[GRID] _check_exit_conditions: profit_ratio=%.2f%% method=%s, target=%.2f%%, "
+                             "stop_loss=%.2f%%, buy_count=%d, sell_count=%d",
+                             profit_ratio * 100, pnl_snapshot['method_detail'], session.target_profit * 100,
+                             session.stop_loss * 100, session.buy_count, session.sell_count)
 
             # 止盈检测（需要买卖配对）
             if session.sell_count > 0 and profit_ratio >= session.target_profit:
@@ -1719,13 +2151,16 @@ class GridTradingManager:
                               f"buy_count={session.buy_count}, sell_count={session.sell_count}")
                 return 'stop_loss'
         else:
-            logger.debug(f"[GRID] _check_exit_conditions: 未有买入记录, 跳过盈亏检测")
+            logger.debug("[GRID] _check_exit_conditions: 未有买入记录, 跳过盈亏检测")
 
         # 3. 时间限制
-        if session.end_time:
-            remaining = session.end_time - datetime.now()
-            logger.debug(f"[GRID] _check_exit_conditions: 时间检测 end_time={session.end_time}, remaining={remaining}")
-            if datetime.now() > session.end_time:
+        end_epoch = session.get_end_time_epoch()
+        if end_epoch is not None:
+            now_epoch = time.time()
+            if debug_enabled:
+                logger.debug("[GRID] _check_exit_conditions: 时间检测 end_time=%s, remaining=%.0fs",
+                             session.end_time, end_epoch - now_epoch)
+            if now_epoch > end_epoch:
                 logger.info(f"[GRID] _check_exit_conditions: {session.stock_code} 达到运行时长限制, 触发退出")
                 return 'expired'
 
@@ -1737,7 +2172,7 @@ class GridTradingManager:
                 "跳过本轮清仓退出判断"
             )
             self._clear_position_cleared_confirmation(session)
-            logger.debug(f"[GRID] _check_exit_conditions: 未触发任何退出条件")
+            logger.debug("[GRID] _check_exit_conditions: 未触发任何退出条件")
             return None
 
         if position_snapshot_provided:
@@ -1747,44 +2182,47 @@ class GridTradingManager:
         else:
             position = self.position_manager.get_position(session.stock_code)
         volume = position.get('volume', 0) if position else 0
-        logger.debug(f"[GRID] _check_exit_conditions: 持仓检测 volume={volume}")
+        logger.debug("[GRID] _check_exit_conditions: 持仓检测 volume=%s", volume)
         if not position or volume == 0:
             if confirm_position_cleared and not self._confirm_position_cleared(session):
-                logger.debug(f"[GRID] _check_exit_conditions: 未触发任何退出条件")
+                logger.debug("[GRID] _check_exit_conditions: 未触发任何退出条件")
                 return None
             logger.info(f"[GRID] _check_exit_conditions: {session.stock_code} 持仓已清空, 触发退出")
             return 'position_cleared'
         self._clear_position_cleared_confirmation(session)
 
-        logger.debug(f"[GRID] _check_exit_conditions: 未触发任何退出条件")
+        logger.debug("[GRID] _check_exit_conditions: 未触发任何退出条件")
         return None
 
     def _check_level_crossing(self, session: GridSession, tracker: PriceTracker, price: float):
         """检查是否穿越档位"""
         levels = session.get_grid_levels()
-        logger.debug(f"[GRID] _check_level_crossing: session_id={session.id}, stock_code={session.stock_code}, "
-                    f"price={price:.2f}, levels=[{levels['lower']:.2f}, {levels['center']:.2f}, {levels['upper']:.2f}], "
-                    f"waiting_callback={tracker.waiting_callback}")
+        # 每个tick都会执行: DEBUG未开启时跳过f-string格式化
+        debug_enabled = logger.isEnabledFor(logging.DEBUG)
+        if debug_enabled:
+            logger.debug(f"[GRID] _check_level_crossing: session_id={session.id}, stock_code={session.stock_code}, "
+                        f"price={price:.2f}, levels=[{levels.lower:.2f}, {levels.center:.2f}, {levels.upper:.2f}], "
+                        f"waiting_callback={tracker.waiting_callback}")
 
         # 检查上穿(卖出档位)
-        if price > levels['upper'] and not tracker.waiting_callback:
-            logger.debug(f"[GRID] _check_level_crossing: 检测到上穿卖出档位 price={price:.2f} > upper={levels['upper']:.2f}")
+        if price > levels.upper and not tracker.waiting_callback:
+            logger.debug(f"[GRID] _check_level_crossing: 检测到上穿卖出档位 price={price:.2f} > upper={levels.upper:.2f}")
             # 检查冷却
-            if self._is_level_in_cooldown(session.id, levels['upper']):
-                logger.debug(f"[GRID] _check_level_crossing: 卖出档位{levels['upper']:.2f}在冷却期, 跳过")
+            if self._is_level_in_cooldown(session.id, levels.upper):
+                logger.debug(f"[GRID] _check_level_crossing: 卖出档位{levels.upper:.2f}在冷却期, 跳过")
                 return
 
-            tracker.crossed_level = levels['upper']
+            tracker.crossed_level = levels.upper
             tracker.peak_price = price
-            tracker.direction = 'rising'
+            tracker.direction = DIR_RISING
             tracker.waiting_callback = True
 
-            logger.info(f"[GRID] _check_level_crossing: {session.stock_code} 穿越卖出档位{levels['upper']:.2f}, "
+            logger.info(f"[GRID] _check_level_crossing: {session.stock_code} 穿越卖出档位{levels.upper:.2f}, "
                        f"price={price:.2f}, 等待回调{session.callback_ratio*100:.2f}%")
 
         # 检查下穿(买入档位)
-        elif price < levels['lower'] and not tracker.waiting_callback:
-            logger.debug(f"[GRID] _check_level_crossing: 检测到下穿买入档位 price={price:.2f} < lower={levels['lower']:.2f}")
+        elif price < levels.lower and not tracker.waiting_callback:
+            logger.debug(f"[GRID] _check_level_crossing: 检测到下穿买入档位 price={price:.2f} < lower={levels.lower:.2f}")
             # Gap 2修复：max_investment 耗尽时跳过买入穿越检测。
             # 若不检查，买入失败后 tracker 虽重置为 waiting=False，但价格仍在下轨以下，
             # 下一个 tick 立刻又检测到穿越并设置 waiting=True，形成每 6 秒一次的慢速循环。
@@ -1794,32 +2232,46 @@ class GridTradingManager:
                                f"跳过买入档位穿越检测，等待卖出后资金回收")
                 return
             # 检查冷却
-            if self._is_level_in_cooldown(session.id, levels['lower']):
-                logger.debug(f"[GRID] _check_level_crossing: 买入档位{levels['lower']:.2f}在冷却期, 跳过")
+            if self._is_level_in_cooldown(session.id, levels.lower):
+                logger.debug(f"[GRID] _check_level_crossing: 买入档位{levels.lower:.2f}在冷却期, 跳过")
                 return
 
-            tracker.crossed_level = levels['lower']
+            tracker.crossed_level = levels.lower
             tracker.valley_price = price
-            tracker.direction = 'falling'
+            tracker.direction = DIR_FALLING
             tracker.waiting_callback = True
 
-            logger.info(f"[GRID] _check_level_crossing: {session.stock_code} 穿越买入档位{levels['lower']:.2f}, "
+            logger.info(f"[GRID] _check_level_crossing: {session.stock_code} 穿越买入档位{levels.lower:.2f}, "
                        f"price={price:.2f}, 等待回升{session.callback_ratio*100:.2f}%")
-        else:
-            logger.debug(f"[GRID] _check_level_crossing: 价格在档位区间内, 无穿越")
+        elif debug_enabled:
+            logger.debug("[GRID] _check_level_crossing: 价格在档位区间内, 无穿越")
+
+    @staticmethod
+    def _schedule_idle_ticks(session: GridSession, price: float) -> None:
+        """价格远离档位时安排跳过后续tick的档位判断: 距最近档位每多一个回调比例可多跳过一个, 上限 GRID_IDLE_TICK_MAX_SKIP"""
+        max_skip = config.GRID_IDLE_TICK_MAX_SKIP
+        callback_ratio = session.callback_ratio
+        if max_skip <= 0 or callback_ratio <= 0 or price <= 0:
+            return
+        levels = session.get_grid_levels()
+        distance = min(levels.upper - price, price - levels.lower) / price
+        skip = int(distance / callback_ratio) - 1
+        if skip > 0:
+            session._idle_ticks = skip if skip < max_skip else max_skip
 
     def _is_level_in_cooldown(self, session_id: int, level_price: float) -> bool:
         """检查档位是否在冷却期"""
-        key = (session_id, level_price)
-        if key not in self.level_cooldowns:
-            logger.debug(f"[GRID] _is_level_in_cooldown: session_id={session_id}, level={level_price:.2f}, 无冷却记录, 返回False")
+        started = self.level_cooldowns.started_at(session_id, level_price)
+        if started is None:
+            logger.debug("[GRID] _is_level_in_cooldown: session_id=%s, level=%.2f, 无冷却记录, 返回False",
+                         session_id, level_price)
             return False
 
-        elapsed = time.time() - self.level_cooldowns[key]
+        elapsed = time.monotonic() - started
         cooldown = config.GRID_LEVEL_COOLDOWN
         in_cooldown = elapsed < cooldown
-        logger.debug(f"[GRID] _is_level_in_cooldown: session_id={session_id}, level={level_price:.2f}, "
-                    f"elapsed={elapsed:.1f}s, cooldown={cooldown}s, in_cooldown={in_cooldown}")
+        logger.debug("[GRID] _is_level_in_cooldown: session_id=%s, level=%.2f, elapsed=%.1fs, cooldown=%ss, in_cooldown=%s",
+                     session_id, level_price, elapsed, cooldown, in_cooldown)
         return in_cooldown
 
     def check_grid_signals(self, stock_code: str, current_price: float) -> Optional[dict]:
@@ -1833,11 +2285,24 @@ class GridTradingManager:
         Returns:
             网格交易信号字典或None
         """
-        logger.debug(f"[GRID] check_grid_signals: stock_code={stock_code}, current_price={current_price:.2f}, "
-                    f"active_sessions_count={len(self.sessions)}")
+        # 每只持仓股每个tick都会进入: 日志参数延迟格式化, DEBUG关闭时不产生字符串
+        logger.debug("[GRID] check_grid_signals: stock_code=%s, current_price=%.2f, active_sessions_count=%d",
+                     stock_code, current_price, len(self.sessions))
 
         self.reconcile_pending_grid_orders_if_due(reason="运行期对账")
 
+        # 无锁快速路径: 多数持仓没有网格会话, 直接读取(dict.get在GIL下是原子的), 不争用全局锁也不预取持仓
+        stock_code_key = self._normalize_code(stock_code)
+        session = self.sessions.get(stock_code_key)
+        if not session:
+            logger.debug("[GRID] check_grid_signals: %s 无活跃会话, 返回None", stock_code)
+            return None
+        if session.status != 'active':
+            logger.debug("[GRID] check_grid_signals: %s 会话状态=%s, 非active, 返回None", stock_code, session.status)
+            return None
+        if not session.enabled:
+            logger.debug("[GRID] check_grid_signals: %s 个股网格开关关闭, 返回None", stock_code)
+            return None
         # A-3修复: 锁外预取持仓，避免在持有 self.lock 时调用 position_manager.get_position()
         # 风险: _check_exit_conditions 内部（条件4）调用 get_position()，若 position_manager
         # 内部某方法先持 signal_lock 再请求 grid_manager.lock，将形成 AB-BA 死锁。
@@ -1847,25 +2312,23 @@ class GridTradingManager:
         position_snapshot_provided = False
         position_lookup_failed = False
         try:
-            position_snapshot = self.position_manager.get_position(stock_code)
+            position_snapshot = self._get_position_for_tick(stock_code, stock_code_key)
             position_snapshot_provided = True
         except Exception as e:
             position_lookup_failed = True
             logger.warning(f"[GRID] check_grid_signals: 锁外预取持仓失败(本轮跳过清仓退出判断): {e}")
 
         with self.lock:
-            session = self.sessions.get(self._normalize_code(stock_code))
-            if not session:
-                logger.debug(f"[GRID] check_grid_signals: {stock_code} 无活跃会话, 返回None")
-                return None
-            if session.status != 'active':
-                logger.debug(f"[GRID] check_grid_signals: {stock_code} 会话状态={session.status}, 非active, 返回None")
-                return None
-            if not session.enabled:
-                logger.debug(f"[GRID] check_grid_signals: {stock_code} 个股网格开关关闭, 返回None")
+            # 预取持仓期间会话可能已被并发停止/替换/暂停, 锁内复核
+            if self.sessions.get(stock_code_key) is not session \
+                    or session.status != 'active' or not session.enabled:
+                logger.debug("[GRID] check_grid_signals: %s 会话已停止或暂停, 返回None", stock_code)
                 return None
 
-            logger.debug(f"[GRID] check_grid_signals: 找到活跃会话 session_id={session.id}, status={session.status}")
+            logger.debug("[GRID] check_grid_signals: 找到活跃会话 session_id=%s, status=%s", session.id, session.status)
+
+            # 清理已到期的档位冷却(最小堆堆顶未到期时为O(1))
+            self.level_cooldowns.expire_due(time.monotonic(), config.GRID_LEVEL_COOLDOWN)
 
             # 1. 检查退出条件（传入锁外预取的持仓快照）
             exit_reason = self._check_exit_conditions(
@@ -1876,48 +2339,83 @@ class GridTradingManager:
                 confirm_position_cleared=True,
                 position_lookup_failed=position_lookup_failed
             )
-            if exit_reason:
-                logger.info(f"[GRID] check_grid_signals: {stock_code} 触发退出条件 reason={exit_reason}")
-                # RISK-4修复：捕获 ValueError，防止并发场景下（如 Web API 同时手动停止）
-                # 第二次调用 stop_grid_session 因会话已消失而抛出未处理异常，导致持仓监控线程崩溃
-                try:
-                    self.stop_grid_session(session.id, exit_reason)
-                except ValueError as e:
-                    logger.warning(f"[GRID] check_grid_signals: 停止会话时会话已不存在（可能已被并发停止）: {e}")
+            if not exit_reason:
+                if session._idle_ticks:
+                    # 上次检查时价格远离档位, 本tick只做退出检查, 跳过追踪器与档位穿越判断
+                    session._idle_ticks -= 1
+                    return None
+
+                # 2. 取出价格追踪器(优先使用会话绑定的追踪器)
+                tracker = session.tracker
+                if tracker is None:
+                    tracker = self.trackers.get(session.id)
+                if not tracker:
+                    logger.warning(f"[GRID] check_grid_signals: session_id={session.id} 无对应的PriceTracker, 返回None")
+                    return None
+                session_lock = self._session_lock(session.id)
+
+        if exit_reason:
+            # 释放全局锁后再停止: stop_grid_session 自行加锁, 撤单与写库不在本线程持锁期间执行
+            logger.info(f"[GRID] check_grid_signals: {stock_code} 触发退出条件 reason={exit_reason}")
+            # RISK-4修复：捕获 ValueError，防止并发场景下（如 Web API 同时手动停止）
+            # 第二次调用 stop_grid_session 因会话已消失而抛出未处理异常，导致持仓监控线程崩溃
+            try:
+                self.stop_grid_session(session.id, exit_reason)
+            except ValueError as e:
+                logger.warning(f"[GRID] check_grid_signals: 停止会话时会话已不存在（可能已被并发停止）: {e}")
+            return None
+
+        # 3. 追踪器状态机只涉及本会话, 在会话锁内执行, 不阻塞其他股票的会话操作
+        # 锁顺序: 全局锁 -> 会话锁; 此处未持有全局锁, 释放会话锁后才重新获取全局锁
+        signal_type = None
+        with session_lock:
+            tracker.update_price(current_price)
+
+            # 检查是否穿越新档位
+            self._check_level_crossing(session, tracker, current_price)
+            # 锁内只取快照, 写库在释放会话锁后执行
+            tracker_state = self._tracker_state_to_persist(session, tracker)
+
+            # 检查回调触发(多数追踪器处于非等待状态, 先行判断免去一次方法调用)
+            if not tracker.waiting_callback:
+                self._schedule_idle_ticks(session, current_price)
+                logger.debug("[GRID] check_grid_signals: %s 未等待回调, 本次检查无信号", stock_code)
+            else:
+                signal_type = tracker.check_callback(session.callback_ratio)
+                if signal_type:
+                    # 锁内只保存档位与峰谷快照, 去重通过后再生成信号, 避免被丢弃的信号打出生成日志
+                    tracker_snapshot = replace(tracker)
+                else:
+                    logger.debug("[GRID] check_grid_signals: %s 本次检查无信号", stock_code)
+
+        if tracker_state is not None:
+            self._persist_tracker_state(session, tracker_state)
+        if not signal_type:
+            return None
+
+        # 4. 重新获取全局锁: 确认会话未被并发停止, 并检查未完成委托与重复信号
+        with self.lock:
+            if self.sessions.get(stock_code_key) is not session \
+                    or session.status != 'active' or not session.enabled:
+                logger.debug(f"[GRID] check_grid_signals: {stock_code} 会话已停止或暂停, 丢弃{signal_type}信号")
                 return None
 
-            # 2. 更新价格追踪器
-            tracker = self.trackers.get(session.id)
-            if not tracker:
-                logger.warning(f"[GRID] check_grid_signals: session_id={session.id} 无对应的PriceTracker, 返回None")
+            if self._has_open_same_side_order_unlocked(session.id, signal_type):
+                logger.debug(
+                    f"[GRID] check_grid_signals: {stock_code} 已有未完成{signal_type}网格委托，跳过新信号"
+                )
                 return None
 
-            tracker.update_price(current_price)
-
-            # 3. 检查是否穿越新档位
-            self._check_level_crossing(session, tracker, current_price)
-
-            # 4. 检查回调触发
-            signal_type = tracker.check_callback(session.callback_ratio)
-            if signal_type:
-                if self._has_open_same_side_order_unlocked(session.id, signal_type):
-                    logger.debug(
-                        f"[GRID] check_grid_signals: {stock_code} 已有未完成{signal_type}网格委托，跳过新信号"
-                    )
+            # ⭐ P1-1修复：信号去重机制 - 检查是否已有相同类型的信号
+            with self.position_manager.signal_lock:
+                existing = self.position_manager.latest_signals.get(stock_code)
+                if existing and existing.get('type') == f'grid_{signal_type.lower()}':
+                    logger.debug(f"[GRID] check_grid_signals: {stock_code} 已有 {signal_type} 信号，跳过重复生成")
                     return None
 
-                # ⭐ P1-1修复：信号去重机制 - 检查是否已有相同类型的信号
-                with self.position_manager.signal_lock:
-                    existing = self.position_manager.latest_signals.get(stock_code)
-                    if existing and existing.get('type') == f'grid_{signal_type.lower()}':
-                        logger.debug(f"[GRID] check_grid_signals: {stock_code} 已有 {signal_type} 信号，跳过重复生成")
-                        return None
-
-                logger.info(f"[GRID] check_grid_signals: {stock_code} 检测到信号 signal_type={signal_type}")
-                return self._create_grid_signal(session, tracker, signal_type, current_price)
-
-            logger.debug(f"[GRID] check_grid_signals: {stock_code} 本次检查无信号")
-            return None
+            signal = self._create_grid_signal(session, tracker_snapshot, signal_type, current_price)
+            logger.info(f"[GRID] check_grid_signals: {stock_code} 检测到信号 signal_type={signal_type}")
+            return signal
 
     def _create_grid_signal(self, session: GridSession, tracker: PriceTracker,
                            signal_type: str, current_price: float) -> dict:
@@ -1962,37 +2460,45 @@ class GridTradingManager:
 
         return signal
 
-    def _rebuild_grid(self, session: GridSession, trade_price: float):
-        """交易后重建网格,以成交价为新中心"""
+    def _rebuild_grid(self, session: GridSession, trade_price: float, persist: bool = True):
+        """交易后重建网格,以成交价为新中心
+
+        Args:
+            persist: 是否单独写库中心价; 调用方已在成交事务中写入时传False
+        """
         logger.debug(f"[GRID] _rebuild_grid: session_id={session.id}, stock_code={session.stock_code}, trade_price={trade_price:.2f}")
 
         old_center = session.current_center_price
         session.current_center_price = trade_price
+        # 档位已随中心价移动, 按旧档位距离安排的降频跳过作废
+        session._idle_ticks = 0
         logger.debug(f"[GRID] _rebuild_grid: 更新中心价 {old_center:.2f} -> {trade_price:.2f}")
 
         # 重置追踪器
         tracker = self.trackers.get(session.id)
         if tracker:
             logger.debug(f"[GRID] _rebuild_grid: 重置PriceTracker")
-            tracker.reset(trade_price)
+            with self._session_lock(session.id):
+                tracker.reset(trade_price)
         else:
             logger.warning(f"[GRID] _rebuild_grid: session_id={session.id} 无对应的PriceTracker")
 
         # 更新数据库（独立保护: 失败时不回滚内存状态，交易统计已由RISK-1/RISK-2保障）
         # 网格中心价不一致会在下一笔交易时自动覆盖，风险可控
-        try:
-            self.db.update_grid_session(session.id, {
-                'current_center_price': trade_price
-            })
-        except Exception as db_err:
-            logger.error(f"[GRID] _rebuild_grid: DB更新center_price失败"
-                        f"(内存已更新,下一笔交易时会覆盖): {db_err}")
-        logger.debug(f"[GRID] _rebuild_grid: 数据库更新完成")
+        if persist:
+            try:
+                self.db.update_grid_session(session.id, {
+                    'current_center_price': trade_price
+                })
+            except Exception as db_err:
+                logger.error(f"[GRID] _rebuild_grid: DB更新center_price失败"
+                            f"(内存已更新,下一笔交易时会覆盖): {db_err}")
+            logger.debug(f"[GRID] _rebuild_grid: 数据库更新完成")
 
         levels = session.get_grid_levels()
         logger.info(f"[GRID] _rebuild_grid: 网格重建完成 {session.stock_code}, "
                    f"旧中心={old_center:.2f} -> 新中心={trade_price:.2f}, "
-                   f"新档位=[{levels['lower']:.2f}, {levels['center']:.2f}, {levels['upper']:.2f}]")
+                   f"新档位=[{levels.lower:.2f}, {levels.center:.2f}, {levels.upper:.2f}]")
 
     @staticmethod
     def _get_attr_or_key(obj, names, default=None):
@@ -2330,9 +2836,11 @@ class GridTradingManager:
             'grid_center_after': price
         }
 
+        # 新中心价随成交同一事务写库, _rebuild_grid 不再单独写一次
         updates = {
             'trade_count': session.trade_count,
-            'current_investment': session.current_investment
+            'current_investment': session.current_investment,
+            'current_center_price': price
         }
         if side == 'BUY':
             updates.update({
@@ -2383,7 +2891,7 @@ class GridTradingManager:
             commission=commission
         )
 
-        self._rebuild_grid(session, price)
+        self._rebuild_grid(session, price, persist=False)
         try:
             self.position_manager._increment_data_version()
         except Exception:
@@ -2630,8 +3138,9 @@ class GridTradingManager:
             self.pending_grid_orders.pop(order_id, None)
             tracker = self.trackers.get(pending.get('session_id'))
             if tracker:
-                tracker.waiting_callback = False
-                tracker.crossed_level = None
+                with self._session_lock(pending.get('session_id')):
+                    tracker.waiting_callback = False
+                    tracker.crossed_level = None
             self._complete_stop_if_no_open_orders_unlocked(pending.get('session_id'))
             logger.warning(
                 f"[GRID] handle_order_callback: 委托终态已处理 order_id={order_id}, "
@@ -2654,20 +3163,21 @@ class GridTradingManager:
         tracker = self.trackers.get(session.id)
         if not tracker:
             return
-        tracker.waiting_callback = True
-        tracker.crossed_level = signal.get('grid_level')
-        if side == 'BUY':
-            tracker.direction = 'falling'
-            tracker.valley_price = self._safe_float(
-                signal.get('valley_price'),
-                self._safe_float(signal.get('trigger_price'), tracker.last_price)
-            )
-        elif side == 'SELL':
-            tracker.direction = 'rising'
-            tracker.peak_price = self._safe_float(
-                signal.get('peak_price'),
-                self._safe_float(signal.get('trigger_price'), tracker.last_price)
-            )
+        with self._session_lock(session.id):
+            tracker.waiting_callback = True
+            tracker.crossed_level = signal.get('grid_level')
+            if side == 'BUY':
+                tracker.direction = DIR_FALLING
+                tracker.valley_price = self._safe_float(
+                    signal.get('valley_price'),
+                    self._safe_float(signal.get('trigger_price'), tracker.last_price)
+                )
+            elif side == 'SELL':
+                tracker.direction = DIR_RISING
+                tracker.peak_price = self._safe_float(
+                    signal.get('peak_price'),
+                    self._safe_float(signal.get('trigger_price'), tracker.last_price)
+                )
 
     def _reorder_grid_order_after_cancel(self, pending_snapshot: dict) -> bool:
         """网格委托撤单确认后，以原信号为锚点重新挂单。"""
@@ -2909,11 +3419,11 @@ class GridTradingManager:
             current_volume = int(position.get('volume', 0) or 0) if position else 0
             if current_volume > 0:
                 # 有持仓：买入量与卖出量统一基数 = 总持仓 × position_ratio
-                volume = (int(current_volume * session.position_ratio) // 100) * 100
+                volume = _floor_to_lot(current_volume * session.position_ratio)
                 if volume < 100:
                     volume = 100
                 # 硬上限：不得超出剩余投资额度
-                max_vol = int(remaining_investment / reserved_price) // 100 * 100
+                max_vol = _floor_to_lot(remaining_investment / reserved_price)
                 if volume > max_vol:
                     logger.debug(f"[GRID] _build_grid_order_plan: {stock_code} 买入量{volume}超出剩余额度限制{max_vol}, 调整")
                     volume = max_vol
@@ -2924,7 +3434,7 @@ class GridTradingManager:
                 )
             else:
                 # 无持仓（首次买入）：回退为基于金额计算
-                volume = (int(buy_amount / reserved_price) // 100) * 100
+                volume = _floor_to_lot(buy_amount / reserved_price)
                 logger.debug(
                     f"[GRID] _build_grid_order_plan: {stock_code} 无持仓，买入量基于金额 "
                     f"buy_amount={buy_amount:.2f}, reserved_price={reserved_price:.4f}, volume={volume}"
@@ -2995,7 +3505,7 @@ class GridTradingManager:
                 )
                 return None
 
-            sell_volume = (int(effective_available * session.position_ratio) // 100) * 100
+            sell_volume = _floor_to_lot(effective_available * session.position_ratio)
             if sell_volume == 0:
                 sell_volume = 100
             if sell_volume > effective_available:
@@ -3076,8 +3586,9 @@ class GridTradingManager:
         """交易失败后重置追踪器，等待价格重新穿越。"""
         tracker = self.trackers.get(session.id)
         if tracker:
-            tracker.waiting_callback = False
-            tracker.crossed_level = None
+            with self._session_lock(session.id):
+                tracker.waiting_callback = False
+                tracker.crossed_level = None
             logger.info(
                 f"[GRID] execute_grid_trade: 交易失败，重置追踪器 waiting_callback=False "
                 f"stock_code={session.stock_code}, signal_type={signal_type}"
@@ -3210,7 +3721,7 @@ class GridTradingManager:
                 cooldown_level = signal.get('grid_level')
                 if cooldown_level is not None:
                     cooldown_key = (session.id, cooldown_level)
-                    self.level_cooldowns[cooldown_key] = time.time()
+                    self.level_cooldowns[cooldown_key] = time.monotonic()
                     logger.debug(f"[GRID] execute_grid_trade: 设置档位冷却 session_id={session.id}, "
                                 f"level={cooldown_level:.2f} (触发档位价格), "
                                 f"signal_type={signal_type}")
@@ -3327,7 +3838,7 @@ class GridTradingManager:
             raw_volume = buy_amount / trigger_price  # 原始股数
 
             # 计算股数 (统一要求100股倍数)
-            volume = (int(raw_volume) // 100) * 100
+            volume = _floor_to_lot(raw_volume)
 
             logger.debug(f"[GRID] _execute_grid_buy: 计算买入数量 raw_volume={raw_volume:.2f}, volume={volume}, min_volume={min_volume}")
 
@@ -3505,10 +4016,9 @@ class GridTradingManager:
             # position_ratio 字段控制每次卖出可卖持仓的比例（买入使用相同字段，语义统一）。
             # A-3修复：基于 available_volume（可卖数量）而非 current_volume（总持仓），
             # 遵守 T+1 规则，避免包含当日买入股份导致无效委托。
-            # BUG-1修复：改用 (int(x) // 100) * 100 形式，语义更清晰：
-            # 先计算应卖股数（浮点转整数截断），再向下取整到100的倍数
-            # 与买入逻辑的整百方式统一，两者数值等价但表达一致
-            sell_volume = (int(available_volume * session.position_ratio) // 100) * 100
+            # BUG-1修复：先计算应卖股数，再向下取整到100的倍数，与买入逻辑的整百方式统一；
+            # _floor_to_lot 带浮点容差，避免如 10000×0.57=5699.999… 被截成5600股
+            sell_volume = _floor_to_lot(available_volume * session.position_ratio)
             logger.debug(f"[GRID] _execute_grid_sell: 计算卖出数量 position_ratio={session.position_ratio*100:.1f}%, "
                          f"available_volume={available_volume}, 初步sell_volume={sell_volume}")
 
@@ -3517,7 +4027,7 @@ class GridTradingManager:
             logger.debug(f"[GRID] _execute_grid_sell: 卖出数量为0, 调整为最小值100")
 
         if sell_volume > available_volume:
-            sell_volume = int(available_volume / 100) * 100
+            sell_volume = (int(available_volume) // 100) * 100
             logger.debug(f"[GRID] _execute_grid_sell: 卖出数量超过可卖持仓(T+1可卖={available_volume}), 调整为{sell_volume}")
 
         if sell_volume == 0:
@@ -3602,12 +4112,7 @@ class GridTradingManager:
 
     def get_session_stats(self, session_id: int) -> dict:
         """获取会话统计信息"""
-        session = None
-        for s in self.sessions.values():
-            if s.id == session_id:
-                session = s
-                break
-
+        session = self._find_session_by_id(session_id)
         if not session:
             return {}
 
@@ -3631,7 +4136,7 @@ class GridTradingManager:
             'enabled': session.enabled,
             'center_price': session.center_price,
             'current_center_price': session.current_center_price,
-            'grid_levels': session.get_grid_levels(),
+            'grid_levels': session.get_grid_levels()._asdict(),
             'trade_count': session.trade_count,
             'buy_count': session.buy_count,
             'sell_count': session.sell_count,
@@ -3650,6 +4155,11 @@ class GridTradingManager:
         """获取交易历史"""
         return self.db.get_grid_trades(session_id, limit, offset)
 
+    def get_trade_history_after(self, session_id: int, before_time: Optional[str] = None,
+                                before_id: Optional[int] = None, limit=50) -> list:
+        """游标分页获取交易历史, before_time/before_id为上一页最后一条记录的trade_time和id"""
+        return self.db.get_grid_trades_after(session_id, before_time, before_id, limit)
+
 
 
 
@@ -199,6 +199,18 @@ class GridTemplateSchema(Schema):
     is_default = fields.Bool()
 
 
+# Schema实例按类缓存: 实例化会深拷贝全部字段与校验器, load() 不保存请求级状态, 可跨请求复用
+_schema_instances: Dict[Type[Schema], Schema] = {}
+
+
+def _get_schema(schema_class: Type[Schema]) -> Schema:
+    """返回 schema_class 的共享实例(首次使用时创建; 并发首建至多多建一个, 无副作用)"""
+    schema = _schema_instances.get(schema_class)
+    if schema is None:
+        schema = _schema_instances[schema_class] = schema_class()
+    return schema
+
+
 def validate_request(schema_class: Type[Schema], data: Dict[str, Any]) -> Tuple[bool, Any]:
     """
     通用请求参数校验函数
@@ -212,7 +224,7 @@ def validate_request(schema_class: Type[Schema], data: Dict[str, Any]) -> Tuple[
             - 如果有效: (True, validated_data)
             - 如果无效: (False, error_messages)
     """
-    schema = schema_class()
+    schema = _get_schema(schema_class)
 
     try:
         validated_data = schema.load(data)
@@ -518,6 +518,14 @@ def cleanup():
             logger.error(f"{thread_name}停止失败:{str(e)[:30]}")
 
     # 第4步: 关闭各个模块(按依赖顺序)
+    try:
+        position_manager = _get_existing_position_manager()
+        grid_manager = getattr(position_manager, "grid_manager", None) if position_manager else None
+        if grid_manager:
+            grid_manager.close()
+    except Exception as e:
+        logger.error(f"网格管理器关闭失败:{str(e)[:30]}")
+
     try:
         trading_strategy = get_trading_strategy()
         trading_strategy.close()